@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark: every public /api route of both apps at 1k / 10k / 100k rows
+
+For each app (cms = cms/app.py, single = SINGLE_FILE_SOLUTION.py) and each
+scale, a fresh subprocess seeds a new SQLite file (bench/seed.py) and then
+drives the app's public API with concurrent Flask test clients for a fixed
+time. Reports throughput and p50/p95/p99 latency per route and overall as
+JSON, so runs can be saved and compared.
+
+    python bench/api_routes.py --scales 1000,10000 --clients 8 --seconds 5
+    python bench/api_routes.py --apps single --cold --output results.json
+
+--cold adds a unique query parameter to every request so the view cache
+never hits and each request does its database work.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from seed import SCALES, load_app, seed_models
+
+
+def routes(app):
+    """(name, url) pairs for the public API of `app`"""
+    today = date.today()
+    window = f'from={today.isoformat()}&to={(today + timedelta(days=31)).isoformat()}'
+    if app == 'cms':
+        return [
+            ('homepage', '/api/homepage'),
+            ('homepage_slides', '/api/homepage/slides'),
+            ('homepage_events', '/api/homepage/events'),
+            ('homepage_meetings', '/api/homepage/meetings'),
+            ('homepage_quick_links', '/api/homepage/quick-links'),
+            ('events', '/api/events?limit=50'),
+            ('events_window', f'/api/events?{window}&limit=200'),
+            ('events_upcoming', '/api/events/upcoming?limit=10'),
+            ('events_months', '/api/events/months'),
+            ('health', '/health'),
+        ]
+    return [
+        ('pages', '/api/pages?limit=50'),
+        ('page', '/api/pages/page-1'),
+        ('news', '/api/news?limit=50'),
+        ('events', '/api/events?limit=50'),
+        ('documents', '/api/documents?limit=50'),
+        ('search', '/api/search?q=allotment+lib'),
+        ('search_documents', '/api/search?q=council&type=document'),
+    ]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    pick = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+    return {'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99)}
+
+
+def drive(application, urls, seconds, clients, cold):
+    stop = threading.Event()
+    results = {name: {'latencies': [], 'errors': 0, 'hits': 0} for name, _ in urls}
+    lock = threading.Lock()
+    counter = iter(range(10 ** 12))
+
+    def client(n):
+        test_client = application.test_client()
+        local = {name: {'latencies': [], 'errors': 0, 'hits': 0} for name, _ in urls}
+        i = n
+        while not stop.is_set():
+            name, url = urls[i % len(urls)]
+            i += 1
+            if cold:
+                url += ('&' if '?' in url else '?') + f'_bench={next(counter)}'
+            began = time.perf_counter()
+            response = test_client.get(url)
+            response.get_data()
+            elapsed = time.perf_counter() - began
+            if response.status_code != 200:
+                local[name]['errors'] += 1
+                continue
+            local[name]['latencies'].append(elapsed)
+            if response.headers.get('X-Cache') == 'HIT':
+                local[name]['hits'] += 1
+        with lock:
+            for name, stats in local.items():
+                results[name]['latencies'].extend(stats['latencies'])
+                results[name]['errors'] += stats['errors']
+                results[name]['hits'] += stats['hits']
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    report = {}
+    everything = []
+    for name, stats in results.items():
+        count = len(stats['latencies'])
+        everything.extend(stats['latencies'])
+        report[name] = dict({
+            'requests': count,
+            'requests_per_sec': round(count / seconds, 1),
+            'errors': stats['errors'],
+            'cache_hit_ratio': round(stats['hits'] / count, 3) if count else 0,
+        }, **percentiles(stats['latencies']))
+    total = dict({
+        'requests': len(everything),
+        'requests_per_sec': round(len(everything) / seconds, 1),
+        'errors': sum(stats['errors'] for stats in results.values()),
+    }, **percentiles(everything))
+    return report, total
+
+
+def run_worker(args):
+    """One app at one scale, in this process; prints a JSON result line"""
+    database = os.path.join(tempfile.mkdtemp(prefix='kesgrave_api_'), 'bench.db')
+    application, db, module = load_app(args.app, database)
+
+    began = time.perf_counter()
+    with application.app_context():
+        seeded = seed_models(db, module, args.rows)
+    seed_seconds = time.perf_counter() - began
+
+    urls = routes(args.app)
+    client = application.test_client()
+    for name, url in urls:
+        status = client.get(url).status_code
+        if status != 200:
+            raise SystemExit(f'{url} returned {status} before the run started')
+
+    report, total = drive(application, urls, args.seconds, args.clients, args.cold)
+    print(json.dumps({
+        'app': args.app,
+        'rows': args.rows,
+        'seeded': seeded,
+        'seed_seconds': round(seed_seconds, 2),
+        'total': total,
+        'routes': report,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', default='cms,single')
+    parser.add_argument('--scales', default=','.join(str(s) for s in SCALES))
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--cold', action='store_true', help='bypass the view cache')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--app', help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    runs = []
+    for app in args.apps.split(','):
+        for rows in (int(s) for s in args.scales.split(',')):
+            command = [sys.executable, os.path.abspath(__file__), '--worker', '--app', app, '--rows', str(rows),
+                       '--clients', str(args.clients), '--seconds', str(args.seconds)]
+            if args.cold:
+                command.append('--cold')
+            # Each app binds its database at import, so every run gets its own interpreter
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = json.dumps({
+        'benchmark': 'api_routes',
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'clients': args.clients,
+        'seconds': args.seconds,
+        'cold': args.cold,
+        'runs': runs,
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
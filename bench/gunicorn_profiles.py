@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: gunicorn worker profiles under concurrent load
+
+Seeds a fresh SQLite file, then for each profile in cms/gunicorn.conf.py
+(sync, gthread, gevent) starts `gunicorn -c gunicorn.conf.py main:app` on a
+local port and drives /api/events and /api/homepage/* with keep-alive
+clients for a fixed time. Prints throughput and latency percentiles as JSON.
+
+    python bench/gunicorn_profiles.py --seconds 10 --clients 16 --workers 2
+
+Needs gunicorn installed (and gevent for the gevent profile - without it
+gunicorn.conf.py falls back to gthread, which the output reports).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from seed import load_app, seed_models
+
+CMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms')
+
+PATHS = [
+    '/api/events?limit=50',
+    '/api/homepage/slides',
+    '/api/homepage/events',
+    '/api/homepage/meetings',
+    '/api/homepage/quick-links',
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(port, deadline):
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health/live')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def drive(port, seconds, clients):
+    stop = threading.Event()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(n):
+        local = []
+        failed = 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        i = n
+        while not stop.is_set():
+            path = PATHS[i % len(PATHS)]
+            i += 1
+            began = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+                local.append(time.perf_counter() - began)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    result = {
+        'requests': len(latencies),
+        'requests_per_sec': round(len(latencies) / seconds, 1),
+        'errors': errors[0],
+    }
+    if latencies:
+        result.update({
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        })
+    return result
+
+
+def run_profile(profile, database, args):
+    port = free_port()
+    env = dict(os.environ, DATABASE_PATH=database, PORT=str(port), GUNICORN_PROFILE=profile,
+               WEB_CONCURRENCY=str(args.workers))
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app'],
+                              cwd=CMS_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        up = wait_until_up(port, time.time() + 30)
+        result = {'profile': profile}
+        if up:
+            result.update(drive(port, args.seconds, args.clients))
+    finally:
+        server.terminate()
+        output = server.communicate(timeout=30)[0]
+    if not up:
+        result.update({'error': 'server did not start', 'output': output[-2000:]})
+    if 'using the gthread profile instead' in output:
+        result['fell_back_to'] = 'gthread'
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--profiles', default='sync,gthread,gevent')
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='kesgrave_gunicorn_'), 'bench.db')
+    application, db, module = load_app('cms', database)
+    with application.app_context():
+        seed_models(db, module, args.rows)
+
+    results = [run_profile(profile, database, args) for profile in args.profiles.split(',')]
+    print(json.dumps({'benchmark': 'gunicorn_profiles', 'clients': args.clients, 'workers': args.workers,
+                      'seconds': args.seconds, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
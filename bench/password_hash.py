@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: password hash cost per KDF setting
+
+Times hashing and verification for each candidate PASSWORD_HASH_METHOD on
+this machine, plus login throughput with PASSWORD_HASH_CONCURRENCY hashes
+allowed at once. Pick the strongest method whose verify time is acceptable
+for a login (roughly 100-300 ms) and set it in the environment; existing
+hashes are upgraded on each user's next login.
+
+    python bench/password_hash.py --runs 5
+    python bench/password_hash.py --method scrypt:65536:8:1 --method pbkdf2:sha256:1000000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms'))
+
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+from passwords import DEFAULT_METHOD  # noqa: E402
+
+METHODS = ('scrypt:16384:8:1', DEFAULT_METHOD, 'scrypt:65536:8:1', 'pbkdf2:sha256:600000')
+PASSWORD = 'correct horse battery staple'
+
+
+def time_ms(fn, *args):
+    began = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - began) * 1000
+
+
+def bench_method(method, runs, concurrency):
+    hash_ms = [time_ms(generate_password_hash, PASSWORD, method) for _ in range(runs)]
+    stored = generate_password_hash(PASSWORD, method)
+    verify_ms = [time_ms(check_password_hash, stored, PASSWORD) for _ in range(runs)]
+
+    attempts = runs * concurrency
+    began = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(lambda _: check_password_hash(stored, PASSWORD), range(attempts)))
+    elapsed = time.perf_counter() - began
+
+    return {
+        'method': method,
+        'hash_length': len(stored),
+        'hash_ms_median': round(statistics.median(hash_ms), 2),
+        'verify_ms_median': round(statistics.median(verify_ms), 2),
+        'verify_ms_max': round(max(verify_ms), 2),
+        'logins_per_second': round(attempts / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--method', action='append', help='KDF method to time (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2)))
+    args = parser.parse_args()
+
+    print(json.dumps({
+        'benchmark': 'password_hash',
+        'runs': args.runs,
+        'concurrency': args.concurrency,
+        'results': [bench_method(m, args.runs, args.concurrency) for m in args.method or METHODS],
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
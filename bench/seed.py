@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Synthetic data for the benchmarks
+
+seed_models() fills Event, Meeting, Slide, Page, NewsItem and Document
+tables with `rows` rows each - whichever of those models the app defines,
+using only the columns that model actually has (cms/app.py and
+SINGLE_FILE_SOLUTION.py declare different Event tables). Dates are spread a
+year either side of now so the upcoming / date-window endpoints have
+something to return.
+
+    python bench/seed.py --app cms --rows 10000 --database /tmp/bench.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+CMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms')
+
+SCALES = (1000, 10000, 100000)
+BATCH = 5000
+ACTIVE_SLIDES = 8  # the homepage shows every active slide
+
+CATEGORIES = ('community', 'council', 'sport', 'family', 'environment')
+WORDS = ('allotment', 'library', 'planning', 'recreation', 'ground', 'youth', 'club', 'councillor',
+         'market', 'festival', 'footpath', 'parking', 'grant', 'heritage', 'volunteer', 'park')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _when(i, rows, now):
+    # Evenly spread over [now - 1 year, now + 1 year]
+    return now - timedelta(days=365) + timedelta(seconds=i * (2 * 365 * 86400 // max(rows, 1)))
+
+
+ROW_FACTORIES = {
+    'Event': lambda i, rows, rng, now: {
+        'title': f'{_text(rng, 3).title()} {i}',
+        'description': _text(rng, 60),
+        'date': _when(i, rows, now),
+        'location': rng.choice(('Community Centre', 'Millennium Field', 'Council Offices')),
+        'category': rng.choice(CATEGORIES),
+        'created_at': now, 'updated_at': now,
+    },
+    'Meeting': lambda i, rows, rng, now: {
+        'title': rng.choice(('Full Council', 'Planning & Development', 'Finance & Governance')),
+        'description': _text(rng, 30),
+        'date': _when(i, rows, now),
+        'location': 'Council Offices',
+        'created_at': now, 'updated_at': now,
+    },
+    'Slide': lambda i, rows, rng, now: {
+        'title': f'Slide {i}',
+        'content': _text(rng, 12),
+        'image_url': f'/static/slides/{i}.jpg',
+        'is_active': i < ACTIVE_SLIDES,
+        'sort_order': i,
+        'created_at': now, 'updated_at': now,
+    },
+    'Page': lambda i, rows, rng, now: {
+        'title': f'{_text(rng, 2).title()} {i}',
+        'content': _text(rng, 200),
+        'slug': f'page-{i}',
+        'created_at': now, 'updated_at': now,
+    },
+    'NewsItem': lambda i, rows, rng, now: {
+        'title': f'{_text(rng, 4).title()} {i}',
+        'content': _text(rng, 120),
+        'date': _when(i, rows, now),
+        'created_at': now, 'updated_at': now,
+    },
+    # Metadata only - the listing and search never open the stored files
+    'Document': lambda i, rows, rng, now: {
+        'title': f'{_text(rng, 3).title()} {i}',
+        'filename': f'document-{i}.pdf',
+        'category': rng.choice(CATEGORIES),
+        'uploaded_at': _when(i, rows, now),
+        'sha256': f'{i:064x}',
+        'size': rng.randint(10_000, 2_000_000),
+        'content_type': 'application/pdf',
+    },
+}
+
+
+def seed_models(db, module, rows, seed=1):
+    """Bulk-insert `rows` rows into every benchmark model `module` defines; returns {model: rows}"""
+    from sqlalchemy import insert
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    counts = {}
+    for name, factory in ROW_FACTORIES.items():
+        model = getattr(module, name, None)
+        if model is None:
+            continue
+        columns = set(model.__table__.columns.keys())
+        for start in range(0, rows, BATCH):
+            batch = []
+            for i in range(start, min(start + BATCH, rows)):
+                row = factory(i, rows, rng, now)
+                batch.append({k: v for k, v in row.items() if k in columns})
+            db.session.execute(insert(model), batch)
+        db.session.commit()
+        counts[name] = rows
+    return counts
+
+
+def load_app(name, database):
+    """
+    Import one of the two apps against `database`, with its schema prepared.
+    Returns (flask app, db, module). Each app binds its database at import, so
+    this can only be called once per process.
+    """
+    sys.path.insert(0, CMS_DIR)
+    from migrations import prepare_database
+
+    if name == 'cms':
+        os.environ['DATABASE_PATH'] = database
+        import app as module
+        application = module.create_app()
+    elif name == 'single':
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+        import SINGLE_FILE_SOLUTION as module
+        application = module.app
+    else:
+        raise ValueError(f'Unknown app {name!r} (expected cms or single)')
+
+    prepare_database(application, module.db, module.setup_database, force=True)
+    return application, module.db, module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=('cms', 'single'), default='cms')
+    parser.add_argument('--rows', type=int, default=SCALES[0])
+    parser.add_argument('--database', required=True)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    application, db, module = load_app(args.app, os.path.abspath(args.database))
+    with application.app_context():
+        counts = seed_models(db, module, args.rows)
+    print(f"✅ Seeded {args.database}: {counts} in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
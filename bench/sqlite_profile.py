@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: public read throughput while admin writes are in flight
+
+Runs the same workload against a fresh SQLite file once with SQLite's
+defaults (rollback journal) and once with the tuned profile from
+cms/db_profile.py (WAL, synchronous=NORMAL, mmap, busy_timeout), and prints
+the results as JSON. Failed reads (locked database) are not counted in
+reads_per_sec, so compare it alongside read_errors / read_error_rate.
+
+    python bench/sqlite_profile.py --seconds 5 --readers 4 --rows 5000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms'))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from db_profile import engine_options, sqlite_pragmas, apply_pragmas  # noqa: E402
+
+READ_SQL = text('SELECT id, title, date FROM event WHERE date >= :start ORDER BY date LIMIT 20')
+WRITE_SQL = text('INSERT INTO event (title, description, date) VALUES (:title, :description, :date)')
+
+
+def make_engine(path, profile):
+    uri = f'sqlite:///{path}'
+    options = engine_options(uri, profile)
+    if profile == 'default':
+        # SQLite's own defaults: no busy timeout, so readers fail fast on locks
+        options['connect_args'] = {'timeout': 0, 'check_same_thread': False}
+    engine = create_engine(uri, **options)
+    pragmas = sqlite_pragmas(profile)
+    if pragmas:
+        event.listen(engine, 'connect', lambda conn, record: apply_pragmas(conn, pragmas))
+    return engine
+
+
+def seed(engine, rows):
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE event (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, '
+                          'description TEXT NOT NULL, date DATETIME NOT NULL)'))
+        start = datetime(2024, 1, 1)
+        conn.execute(WRITE_SQL, [
+            {'title': f'Event {i}', 'description': 'x' * 500, 'date': start + timedelta(hours=i)}
+            for i in range(rows)
+        ])
+
+
+def run_profile(profile, seconds, readers, rows, write_batch):
+    directory = tempfile.mkdtemp(prefix='kesgrave_bench_')
+    path = os.path.join(directory, 'bench.db')
+    engine = make_engine(path, profile)
+    seed(engine, rows)
+
+    stop = threading.Event()
+    latencies = []
+    errors = {'read': 0, 'write': 0}
+    writes = [0]
+    lock = threading.Lock()
+
+    def reader():
+        local = []
+        failed = 0
+        start = datetime(2024, 1, 1)
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ_SQL, {'start': start}).fetchall()
+                local.append(time.perf_counter() - began)
+            except OperationalError:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors['read'] += failed
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(WRITE_SQL, [
+                        {'title': f'New {n + i}', 'description': 'y' * 500, 'date': datetime(2025, 1, 1)}
+                        for i in range(write_batch)
+                    ])
+                n += write_batch
+            except OperationalError:
+                errors['write'] += 1
+        writes[0] = n
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    latencies.sort()
+    attempts = len(latencies) + errors['read']
+    result = {
+        'profile': profile,
+        'reads': len(latencies),
+        'reads_per_sec': round(len(latencies) / seconds, 1),
+        'read_errors': errors['read'],
+        'read_error_rate': round(errors['read'] / attempts, 3) if attempts else 0,
+        'rows_written': writes[0],
+        'write_errors': errors['write'],
+    }
+    if latencies:
+        result['read_p50_ms'] = round(statistics.median(latencies) * 1000, 3)
+        result['read_p95_ms'] = round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--write-batch', type=int, default=50)
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args.seconds, args.readers, args.rows, args.write_batch)
+               for profile in ('default', 'tuned')]
+    for result in results:
+        print(f"{result['profile']}: {result['reads_per_sec']} reads/s, {result['read_errors']} read errors "
+              f"({result['read_error_rate']:.1%} of attempts), {result['write_errors']} write errors", file=sys.stderr)
+    print(json.dumps({'benchmark': 'sqlite_profile', 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
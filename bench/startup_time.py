@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CMS worker start-up time
+
+Each run starts a fresh interpreter (like a new gunicorn worker) and times
+`import main`, counting how many database connections are opened while doing
+so - that should be zero now that schema setup is a separate step. The
+one-off setup (`prepare_database(..., force=True)`, i.e. what every worker
+used to do on import) is timed separately for comparison.
+
+    python bench/startup_time.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms')
+
+PROBE = r'''
+import json, sys, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+connections = []
+event.listen(Engine, 'connect', lambda *args: connections.append(1))
+
+began = time.perf_counter()
+import main
+import_ms = (time.perf_counter() - began) * 1000
+worker_connections = len(connections)
+
+from migrations import prepare_database
+began = time.perf_counter()
+prepare_database(main.app, main.db, main.setup_database, force=True)
+setup_ms = (time.perf_counter() - began) * 1000
+
+print(json.dumps({'import_ms': import_ms, 'worker_connections': worker_connections, 'setup_ms': setup_ms}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='kesgrave_startup_')
+    env = dict(os.environ, DATABASE_PATH=os.path.join(directory, 'startup.db'))
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], cwd=CMS_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps({
+        'benchmark': 'startup_time',
+        'runs': args.runs,
+        'worker_import_ms_median': round(statistics.median(s['import_ms'] for s in samples), 2),
+        'worker_db_connections': max(s['worker_connections'] for s in samples),
+        'schema_setup_ms_median': round(statistics.median(s['setup_ms'] for s in samples), 2),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: admin page render time, inline strings vs the template loader
+
+"before" renders each admin template from its source with
+render_template_string, which parses and compiles the Jinja source on every
+call (what the admin views used to do). "after" uses render_template, which
+compiles once per process and then reuses the compiled template.
+
+    python bench/template_render.py --iterations 500 --rows 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+CMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cms')
+sys.path.insert(0, CMS_DIR)
+
+from flask import Flask, render_template, render_template_string  # noqa: E402
+
+from templating import configure_templates  # noqa: E402
+
+
+def sample_context(rows):
+    start = datetime(2025, 1, 1, 19, 30)
+    items = [SimpleNamespace(id=i, title=f'Item {i}', date=start + timedelta(days=i), location='Council Chambers')
+             for i in range(rows)]
+    job_status = {
+        'counts': {'pending': 1, 'running': 0, 'done': 8, 'failed': 1},
+        'recent': [{'id': i, 'name': 'publish', 'status': 'done', 'attempts': 1, 'max_attempts': 3,
+                    'created_at': start, 'finished_at': start, 'last_error': None} for i in range(10)],
+    }
+    return {
+        'cms/login.html': {'db_path': 'kesgrave_working.db'},
+        'cms/dashboard.html': {'event_count': rows, 'meeting_count': rows, 'slide_count': 5, 'db_path': 'kesgrave_working.db',
+                               'job_status': job_status},
+        'cms/events.html': {'events': items, 'event_count': rows},
+        'cms/meetings.html': {'meetings': items, 'meeting_count': rows},
+    }
+
+
+def time_renders(render, iterations):
+    began = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    return (time.perf_counter() - began) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=100)
+    args = parser.parse_args()
+
+    app = Flask('bench', template_folder=os.path.join(CMS_DIR, 'templates'))
+    app.config['SECRET_KEY'] = 'bench'
+    configure_templates(app)
+
+    results = []
+    with app.test_request_context('/'):
+        for name, context in sample_context(args.rows).items():
+            source = app.jinja_loader.get_source(app.jinja_env, name)[0]
+            render_template(name, **context)  # warm up: first compile happens here
+            before = time_renders(lambda: render_template_string(source, **context), args.iterations)
+            after = time_renders(lambda: render_template(name, **context), args.iterations)
+            results.append({
+                'template': name,
+                'before_ms': round(before, 4),
+                'after_ms': round(after, 4),
+                'speedup': round(before / after, 1) if after else None,
+            })
+
+    print(json.dumps({'benchmark': 'template_render', 'iterations': args.iterations,
+                      'rows': args.rows, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,25 @@
 import os
-from flask import Flask, render_template_string, redirect, url_for, request, flash, jsonify
+from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_cors import CORS
 from datetime import datetime
+from pagination import keyset_response, parse_limit
+from search import search, fts5_available, ensure_search_index, optimize_search_index, register_search_cli, SOURCES as SEARCH_SOURCES
+from conditional import conditional
+from cache import Cache
+from instrumentation import Instrumentation
+from db_profile import configure_database
+from templating import configure_templates
+from migrations import upgrade, prepare_database, register_cli
+from bulk import import_response, export_response, register_bulk_cli
+from ical import calendar_response
+from publish import Publisher
+from fragments import fragments, json_response
+from identity import Identity, IdentityCache
+from passwords import PasswordHasher, LoginThrottle, HasherBusy
+from documents import DocumentStore, DocumentError, safe_filename
+from jobs import JobQueue
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -13,11 +29,32 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'fallback-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///kesgrave.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# WAL mode, connection pragmas and pool sizing (see db_profile.py)
+configure_database(app)
+
+# Admin templates from cms/templates with a bytecode cache (see templating.py)
+configure_templates(app)
+
 # Initialize extensions
 db = SQLAlchemy(app)
+cache = Cache(app, db)
+# Per-row JSON fragments (see fragments.py) follow cache invalidations
+cache.on_invalidate(fragments.invalidate)
+# Logged-in admin identity without a user query per request (see identity.py)
+identities = IdentityCache(app, cache)
+# Tunable password hashing and login rate limits (see passwords.py)
+passwords = PasswordHasher(app)
+login_throttle = LoginThrottle(app)
+# Content-addressed document files under DOCUMENT_DIR (see documents.py)
+documents = DocumentStore(app)
+# Post-commit work runs as background jobs, not in the request (see jobs.py)
+jobs = JobQueue(app, db)
+# Server-Timing headers and /metrics when INSTRUMENTATION=1 (see instrumentation.py)
+instrumentation = Instrumentation(app, db)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
+register_search_cli(app, db)
 
 # Enable CORS
 CORS(app, origins=[
@@ -29,7 +66,7 @@ CORS(app, origins=[
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password = db.Column(db.String(120), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # passwords.py hash
     
     def is_authenticated(self):
         return True
@@ -56,27 +93,36 @@ class NewsItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
-    date = db.Column(db.DateTime, default=datetime.utcnow)
+    date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bulk imports update events in place, so versions can't rely on created_at
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Document(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     filename = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(100))
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # SHA-256 of the stored file (documents.py); shared by duplicate uploads
+    sha256 = db.Column(db.String(64), index=True)
+    size = db.Column(db.Integer)
+    content_type = db.Column(db.String(100))
 
 @login_manager.user_loader
+@identities.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user = db.session.get(User, int(user_id))
+    return Identity(user.id, user.username) if user else None
 
 # Login route
 @app.route('/login', methods=['GET', 'POST'])
@@ -84,127 +130,107 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        user = User.query.filter_by(username=username, password=password).first()
-        if user:
+        # Rejected before any hashing or database work
+        if login_throttle.check(username):
+            flash('Too many login attempts, please try again later')
+            return render_template('simple/login.html'), 429
+        user = User.query.filter_by(username=username).first()
+        try:
+            ok, rehash = passwords.verify(user.password if user else None, password)
+        except HasherBusy:
+            flash('Too many login attempts, please try again later')
+            return render_template('simple/login.html'), 429
+        if ok:
+            if rehash:
+                # Upgrade plaintext or old-method hashes transparently - or
+                # at the next login if every hashing slot is taken right now
+                try:
+                    user.password = passwords.hash(password)
+                    db.session.commit()
+                except HasherBusy:
+                    pass
+            login_throttle.succeeded(username)
             login_user(user)
+            identities.remember(user)
             return redirect(url_for('admin_dashboard'))
+        login_throttle.failed(username)
         flash('Invalid credentials')
     
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>CMS Login</title></head>
-    <body>
-        <h2>CMS Login</h2>
-        <form method="post">
-            <p>Username: <input type="text" name="username" required></p>
-            <p>Password: <input type="password" name="password" required></p>
-            <p><input type="submit" value="Login"></p>
-        </form>
-    </body>
-    </html>
-    ''')
+    return render_template('simple/login.html')
 
 @app.route('/logout')
 @login_required
 def logout():
     logout_user()
+    identities.forget()
     return redirect(url_for('login'))
 
 # Admin dashboard
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>CMS Dashboard</title></head>
-    <body>
-        <h1>CMS Dashboard</h1>
-        <nav>
-            <a href="{{ url_for('manage_pages') }}">Manage Pages</a> |
-            <a href="{{ url_for('manage_news') }}">Manage News</a> |
-            <a href="{{ url_for('manage_events') }}">Manage Events</a> |
-            <a href="{{ url_for('logout') }}">Logout</a>
-        </nav>
-    </body>
-    </html>
-    ''')
+    return render_template('simple/dashboard.html', job_status=jobs.summary())
 
 # API Routes for frontend
+def page_to_dict(page):
+    return {
+        'id': page.id,
+        'title': page.title,
+        'content': page.content,
+        'slug': page.slug,
+        'updated_at': page.updated_at.isoformat() if page.updated_at else None
+    }
+
 @app.route('/api/pages')
+@cache.cached('Page')
+@conditional(Page)
 def api_pages():
-    pages = Page.query.all()
-    return jsonify([{
-        'id': p.id,
-        'title': p.title,
-        'content': p.content,
-        'slug': p.slug,
-        'updated_at': p.updated_at.isoformat() if p.updated_at else None
-    } for p in pages])
+    return keyset_response(Page, ['id', 'title', 'content', 'slug', 'updated_at'], ['id'])
 
 @app.route('/api/pages/<slug>')
+@cache.cached('Page')
+@conditional(Page)
 def api_page(slug):
     page = Page.query.filter_by(slug=slug).first()
     if page:
-        return jsonify({
-            'id': page.id,
-            'title': page.title,
-            'content': page.content,
-            'slug': page.slug,
-            'updated_at': page.updated_at.isoformat() if page.updated_at else None
-        })
+        return json_response(fragments.fragment(Page, page, page_to_dict, 'page'))
     return jsonify({'error': 'Page not found'}), 404
 
 @app.route('/api/news')
+@cache.cached('NewsItem')
+@conditional(NewsItem)
 def api_news():
-    news = NewsItem.query.order_by(NewsItem.date.desc()).all()
-    return jsonify([{
-        'id': n.id,
-        'title': n.title,
-        'content': n.content,
-        'date': n.date.isoformat() if n.date else None
-    } for n in news])
+    return keyset_response(NewsItem, ['id', 'title', 'content', 'date'], ['date', 'id'], descending=True)
 
 @app.route('/api/events')
+@cache.cached('Event')
+@conditional(Event)
 def api_events():
-    events = Event.query.order_by(Event.date.asc()).all()
-    return jsonify([{
-        'id': e.id,
-        'title': e.title,
-        'description': e.description,
-        'date': e.date.isoformat() if e.date else None,
-        'location': e.location
-    } for e in events])
+    return keyset_response(Event, ['id', 'title', 'description', 'date', 'location'], ['date', 'id'])
+
+@app.route('/api/search')
+@cache.cached('Page', 'NewsItem', 'Event', 'Document')
+@conditional(Page, NewsItem, Event, Document)
+def api_search():
+    """Full-text search: ?q=allotments&type=page,news&limit=20"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    if not fts5_available(db):
+        return jsonify({'error': 'Search is not available'}), 503
+    kinds = [k for k in request.args.get('type', '').split(',') if k in SEARCH_SOURCES] or None
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(search(db, q, kinds, limit))
 
 # Page management
 @app.route('/admin/pages')
 @login_required
 def manage_pages():
     pages = Page.query.all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage Pages</title></head>
-    <body>
-        <h1>Manage Pages</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add New Page</h2>
-        <form method="post" action="{{ url_for('add_page') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Slug: <input type="text" name="slug" required></p>
-            <p>Content: <textarea name="content" rows="10" cols="50" required></textarea></p>
-            <p><input type="submit" value="Add Page"></p>
-        </form>
-        <h2>Existing Pages</h2>
-        <ul>
-        {% for page in pages %}
-            <li>{{ page.title }} ({{ page.slug }}) - <a href="{{ url_for('edit_page', id=page.id) }}">Edit</a></li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', pages=pages)
+    return render_template('simple/pages.html', pages=pages)
 
 @app.route('/admin/pages/add', methods=['POST'])
 @login_required
@@ -223,22 +249,7 @@ def add_page():
 @login_required
 def edit_page(id):
     page = Page.query.get_or_404(id)
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Edit Page</title></head>
-    <body>
-        <h1>Edit Page</h1>
-        <a href="{{ url_for('manage_pages') }}">Back to Pages</a>
-        <form method="post" action="{{ url_for('update_page', id=page.id) }}">
-            <p>Title: <input type="text" name="title" value="{{ page.title }}" required></p>
-            <p>Slug: <input type="text" name="slug" value="{{ page.slug }}" required></p>
-            <p>Content: <textarea name="content" rows="10" cols="50" required>{{ page.content }}</textarea></p>
-            <p><input type="submit" value="Update Page"></p>
-        </form>
-    </body>
-    </html>
-    ''', page=page)
+    return render_template('simple/edit_page.html', page=page)
 
 @app.route('/admin/pages/<int:id>/update', methods=['POST'])
 @login_required
@@ -256,28 +267,7 @@ def update_page(id):
 @login_required
 def manage_news():
     news = NewsItem.query.order_by(NewsItem.date.desc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage News</title></head>
-    <body>
-        <h1>Manage News</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add News Item</h2>
-        <form method="post" action="{{ url_for('add_news') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Content: <textarea name="content" rows="10" cols="50" required></textarea></p>
-            <p><input type="submit" value="Add News"></p>
-        </form>
-        <h2>Existing News</h2>
-        <ul>
-        {% for item in news %}
-            <li>{{ item.title }} - {{ item.date.strftime('%Y-%m-%d') }}</li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', news=news)
+    return render_template('simple/news.html', news=news)
 
 @app.route('/admin/news/add', methods=['POST'])
 @login_required
@@ -296,30 +286,7 @@ def add_news():
 @login_required
 def manage_events():
     events = Event.query.order_by(Event.date.asc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage Events</title></head>
-    <body>
-        <h1>Manage Events</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add Event</h2>
-        <form method="post" action="{{ url_for('add_event') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Description: <textarea name="description" rows="5" cols="50" required></textarea></p>
-            <p>Date: <input type="datetime-local" name="date" required></p>
-            <p>Location: <input type="text" name="location"></p>
-            <p><input type="submit" value="Add Event"></p>
-        </form>
-        <h2>Upcoming Events</h2>
-        <ul>
-        {% for event in events %}
-            <li>{{ event.title }} - {{ event.date.strftime('%Y-%m-%d %H:%M') }} at {{ event.location or 'TBD' }}</li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', events=events)
+    return render_template('simple/events.html', events=events)
 
 @app.route('/admin/events/add', methods=['POST'])
 @login_required
@@ -336,22 +303,165 @@ def add_event():
     
     return redirect(url_for('manage_events'))
 
+# Documents - streamed uploads, content-addressed storage (see documents.py)
+def document_url(document):
+    return url_for('download_document', digest=document.sha256, filename=document.filename)
+
+@app.route('/admin/documents')
+@login_required
+def manage_documents():
+    docs = Document.query.order_by(Document.uploaded_at.desc()).all()
+    return render_template('simple/documents.html', documents=docs, document_url=document_url)
+
+@app.route('/admin/documents/upload', methods=['POST'])
+@login_required
+def upload_document():
+    """
+    A multipart form (file, title, category), or the raw file as the request
+    body with ?title=&filename=&category= for scripted uploads
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        # Werkzeug spools multipart files over 500 KB to a temporary file
+        stream, name, content_type = upload.stream, upload.filename, upload.mimetype
+        fields = request.form
+    else:
+        stream, name, content_type = request.stream, request.args.get('filename'), request.mimetype
+        fields = request.args
+
+    title = (fields.get('title') or '').strip()
+    if not title or not name:
+        if upload is None:
+            return jsonify({'error': 'title and filename are required'}), 400
+        flash('Title and file are required')
+        return redirect(url_for('manage_documents'))
+
+    document = Document(title=title, filename=safe_filename(name), category=fields.get('category') or None,
+                        content_type=content_type or None)
+
+    def add_row(digest, size):
+        # Committed under the store's lock - see documents.py
+        document.sha256, document.size = digest, size
+        db.session.add(document)
+        db.session.commit()
+
+    try:
+        digest, size = documents.save(stream, add_row)
+    except DocumentError as e:
+        if upload is None:
+            return jsonify({'error': str(e)}), 400
+        flash(str(e))
+        return redirect(url_for('manage_documents'))
+
+    if upload is None:
+        return jsonify({'id': document.id, 'sha256': digest, 'size': size, 'url': document_url(document)}), 201
+    return redirect(url_for('manage_documents'))
+
+@app.route('/admin/documents/<int:id>/delete', methods=['POST'])
+@login_required
+def delete_document(id):
+    document = Document.query.get_or_404(id)
+    digest = document.sha256
+    db.session.delete(document)
+    db.session.commit()
+    # The file may be shared with other rows uploading the same content
+    if digest:
+        documents.delete(digest, lambda d: Document.query.filter_by(sha256=d).first() is not None)
+    return redirect(url_for('manage_documents'))
+
+@app.route('/documents/<int:id>')
+def document_link(id):
+    """Stable link to a document's current file"""
+    document = Document.query.get_or_404(id)
+    if not document.sha256:
+        abort(404)
+    return redirect(document_url(document))
+
+@app.route('/documents/<digest>/<filename>')
+def download_document(digest, filename):
+    document = Document.query.filter_by(sha256=digest).first()
+    if document is None:
+        abort(404)
+    return documents.send(digest, filename, document.content_type)
+
+@app.route('/api/documents')
+@cache.cached('Document')
+@conditional(Document)
+def api_documents():
+    # Files are at /documents/<sha256>/<filename>
+    return keyset_response(Document, ['id', 'title', 'filename', 'category', 'uploaded_at', 'sha256', 'size'],
+                           ['uploaded_at', 'id'], descending=True)
+
+# Calendar subscription feed - cached until an Event write, 304 on a matching ETag
+@app.route('/calendar/events.ics')
+@cache.cached('Event')
+@conditional(Event)
+def calendar_events():
+    events = Event.query.order_by(Event.date.asc(), Event.id.asc()).all()
+    return calendar_response(events, 'Kesgrave Town Council Events')
+
+# Bulk import (upsert on title + date) and streamed export - see bulk.py
+@app.route('/admin/events/import', methods=['POST'])
+@login_required
+def import_events():
+    return import_response(db, Event, cache)
+
+@app.route('/admin/events/export')
+@login_required
+def export_events():
+    return export_response(Event)
+
+# Static JSON snapshots for a CDN when PUBLISH_DIR is set (see publish.py)
+def publish_targets():
+    targets = [('/api/pages?limit=200', ('Page',))]
+    targets += [(f'/api/pages/{slug}', ('Page',)) for (slug,) in db.session.query(Page.slug)]
+    targets += [
+        ('/api/news?limit=200', ('NewsItem',)),
+        ('/api/events?limit=200', ('Event',)),
+        ('/api/documents?limit=200', ('Document',)),
+    ]
+    return targets
+
+publisher = Publisher(app, cache, publish_targets, jobs)
+
+# The search triggers write small FTS5 segments; merge them once a burst of
+# edits has settled rather than on every save
+SEARCH_OPTIMIZE_DELAY = int(os.environ.get('SEARCH_OPTIMIZE_DELAY', 300))
+SEARCH_TAGS = {'Page', 'NewsItem', 'Event', 'Document'}
+
+@jobs.task('optimize-search')
+def optimize_search_job():
+    if fts5_available(db):
+        optimize_search_index(db)
+
+def queue_search_optimize(tags):
+    if tags & SEARCH_TAGS:
+        jobs.try_enqueue('optimize-search', delay=SEARCH_OPTIMIZE_DELAY)
+
+cache.on_invalidate(queue_search_optimize)
+
 # Root route
 @app.route('/')
 def index():
     return redirect(url_for('admin_dashboard'))
 
-# Create tables
-with app.app_context():
-    db.create_all()
+# Create tables - a one-off step ('flask --app SINGLE_FILE_SOLUTION init-db'),
+# not something every worker does on import
+def setup_database():
+    # create_all() plus columns/indexes it never adds to existing tables
+    upgrade(db)
+    ensure_search_index(db)
     
     # Create default admin user if it doesn't exist
     if not User.query.filter_by(username='admin').first():
-        admin_user = User(username='admin', password='admin123')  # Change this password!
+        admin_user = User(username='admin', password=passwords.hash('admin123'))  # Change this password!
         db.session.add(admin_user)
         db.session.commit()
 
+register_cli(app, db, setup_database)
+register_bulk_cli(app, db, {'events': Event}, cache)
+
 if __name__ == '__main__':
+    prepare_database(app, db, setup_database)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
-
@@ -1,42 +1,50 @@
 import os
-from flask import Flask, render_template_string, redirect, url_for, request, flash, jsonify
+from flask import Flask, Blueprint, current_app, render_template, redirect, url_for, request, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta
+import re
 import json
+from conditional import conditional, today
+from cache import Cache
+from instrumentation import Instrumentation
+from db_profile import configure_database
+from templating import configure_templates
+from migrations import upgrade, prepare_database, register_cli
+from pagination import keyset_response, parse_limit
+from sqlalchemy import func
+from stats import count_rows
+from bulk import import_response, export_response, register_bulk_cli
+from ical import calendar_response
+from publish import Publisher
+from fragments import fragments, json_list, json_response
+from passwords import PasswordHasher, LoginThrottle, HasherBusy
+from images import ImagePipeline
+from jobs import JobQueue
 
-# Initialize Flask app
-app = Flask(__name__)
+# Initialize extensions - bound to an app in create_app()
+db = SQLAlchemy()
+cache = Cache()
+instrumentation = Instrumentation()
+publisher = Publisher()
+jobs = JobQueue()
+images = ImagePipeline()
+passwords = PasswordHasher()
+login_throttle = LoginThrottle()
+login_manager = LoginManager()
+login_manager.login_view = 'cms.login'
 
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'kesgrave-cms-secret-key-2025')
+# All routes live on this blueprint so the app itself can be built by a factory
+bp = Blueprint('cms', __name__)
 
-# Database configuration - FIXED for Render deployment
-if os.environ.get("RENDER"):
-    # On Render, use a persistent SQLite database in /opt/render/project/src
-    db_path = "/opt/render/project/src/kesgrave_working.db"
-    print(f"📁 Render environment detected, using database path: {db_path}")
-else:
+def database_path():
+    # Database configuration - FIXED for Render deployment
+    if os.environ.get("RENDER"):
+        # On Render, use a persistent SQLite database in /opt/render/project/src
+        return "/opt/render/project/src/kesgrave_working.db"
     # Local development
-    db_path = "kesgrave_working.db"
-    print(f"📁 Local environment, using database path: {db_path}")
-
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
-
-# Enable CORS
-CORS(app, origins=[
-    os.environ.get('FRONTEND_URL', 'http://localhost:3000'),
-    'https://kesgrave-cms.onrender.com',
-    'https://kesgravetowncouncil.onrender.com'
-])
+    return os.environ.get('DATABASE_PATH', "kesgrave_working.db")
 
 # User class for authentication
 class AdminUser(UserMixin):
@@ -50,11 +58,17 @@ def load_user(user_id):
 
 # Minimal Database Models - only basic columns
 class Event(db.Model):
+    __table_args__ = (
+        # Events calendar: WHERE category = ? AND date in [from, to)
+        db.Index('ix_event_category_date', 'category', 'date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200))
+    category = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -62,12 +76,17 @@ class Meeting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    date = db.Column(db.DateTime, nullable=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     location = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Slide(db.Model):
+    __table_args__ = (
+        # Homepage carousel: WHERE is_active ORDER BY sort_order
+        db.Index('ix_slide_active_order', 'is_active', 'sort_order'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text)
@@ -77,182 +96,161 @@ class Slide(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Serializers for the public JSON API
+def event_to_dict(e):
+    return {
+        'id': e.id,
+        'title': e.title,
+        'description': e.description,
+        'date': e.date.isoformat() if e.date else None,
+        'location': e.location,
+        'category': e.category
+    }
+
+def meeting_to_dict(m):
+    return {
+        'id': m.id,
+        'title': m.title,
+        'type': m.title,  # the homepage lists meetings by name
+        'description': m.description,
+        'date': m.date.isoformat() if m.date else None,
+        'location': m.location
+    }
+
+def slide_to_dict(s):
+    return {
+        'id': s.id,
+        'title': s.title,
+        'content': s.content,
+        'description': s.content,
+        'image_url': s.image_url,
+        'featured_image': s.image_url,
+        # Resized AVIF/WebP/JPEG copies once built (see images.py)
+        **images.variants(s.image_url),
+        'sort_order': s.sort_order
+    }
+
+# Quick links have no model yet - served as a fixed list like the footer links
+QUICK_LINKS = [
+    {'id': 1, 'title': 'Report an Issue', 'description': 'Report potholes, street lighting, or other local issues directly to the council.', 'url': '/contact', 'button_text': 'Report Now'},
+    {'id': 2, 'title': 'Planning Applications', 'description': 'View current planning applications and submit comments on local developments.', 'url': '/content', 'button_text': 'View Applications'},
+    {'id': 3, 'title': 'Council Tax Information', 'description': 'Find information about council tax rates, payments, and support available.', 'url': '/content', 'button_text': 'Learn More'},
+    {'id': 4, 'title': 'Local Services', 'description': 'Access information about local services including waste collection and recycling.', 'url': '/content', 'button_text': 'View Services'}
+]
+
+HOMEPAGE_EVENT_LIMIT = 6
+HOMEPAGE_MEETING_LIMIT = 4
+
+# Homepage bundle cache
+# The bundle is built once and reused until a Slide, Event or Meeting is
+# committed (see cache.py). The TTL is a safety net for other gunicorn
+# workers when the per-process memory backend is used.
+HOMEPAGE_CACHE_TTL = int(os.environ.get('HOMEPAGE_CACHE_TTL', 60))
+HOMEPAGE_TAGS = ('Slide', 'Event', 'Meeting')
+
+def build_homepage_payload():
+    now = datetime.utcnow()
+    slides = Slide.query.filter_by(is_active=True).order_by(Slide.sort_order.asc(), Slide.id.asc()).all()
+    events = Event.query.filter(Event.date >= now).order_by(Event.date.asc()).limit(HOMEPAGE_EVENT_LIMIT).all()
+    meetings = Meeting.query.filter(Meeting.date >= now).order_by(Meeting.date.asc()).limit(HOMEPAGE_MEETING_LIMIT).all()
+    return {
+        'slides': [slide_to_dict(s) for s in slides],
+        'events': [event_to_dict(e) for e in events],
+        'meetings': [meeting_to_dict(m) for m in meetings],
+        'quick_links': QUICK_LINKS,
+        'generated_at': now.isoformat()
+    }
+
+def get_homepage_payload():
+    return cache.get_or_set('homepage', build_homepage_payload, HOMEPAGE_TAGS, HOMEPAGE_CACHE_TTL)
+
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
+
+_admin_hash = {}
 
-@app.route('/login', methods=['GET', 'POST'])
+def admin_password_hash():
+    """ADMIN_PASSWORD_HASH (from 'flask hash-password'), else ADMIN_PASSWORD hashed once per process"""
+    configured = os.environ.get('ADMIN_PASSWORD_HASH')
+    if configured:
+        return configured
+    password = os.environ.get('ADMIN_PASSWORD', 'admin123')
+    if _admin_hash.get('password') != password:
+        _admin_hash.update(password=password, hash=passwords.hash(password))
+    return _admin_hash['hash']
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
-        # Simple authentication (you should use proper password hashing in production)
-        if username == 'admin' and password == os.environ.get('ADMIN_PASSWORD', 'admin123'):
+        # Rejected before any hashing work (see passwords.py)
+        if login_throttle.check(username):
+            flash('Too many login attempts, please try again later.', 'error')
+            return render_template('cms/login.html', db_path=current_app.config['DB_PATH']), 429
+        try:
+            # Unknown usernames are still checked against a dummy hash
+            ok, _ = passwords.verify(admin_password_hash() if username == 'admin' else None, password)
+        except HasherBusy:
+            flash('Too many login attempts, please try again later.', 'error')
+            return render_template('cms/login.html', db_path=current_app.config['DB_PATH']), 429
+        if ok:
+            login_throttle.succeeded(username)
             user = AdminUser(1)
             login_user(user)
             flash('Logged in successfully!', 'success')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('.dashboard'))
         else:
+            login_throttle.failed(username)
             flash('Invalid username or password!', 'error')
     
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Kesgrave CMS - Login</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 400px; margin: 100px auto; padding: 20px; }
-            .form-group { margin-bottom: 15px; }
-            label { display: block; margin-bottom: 5px; font-weight: bold; }
-            input[type="text"], input[type="password"] { width: 100%; padding: 8px; border: 1px solid #ddd; border-radius: 4px; }
-            button { background-color: #007bff; color: white; padding: 10px 20px; border: none; border-radius: 4px; cursor: pointer; width: 100%; }
-            button:hover { background-color: #0056b3; }
-            .alert { padding: 10px; margin-bottom: 15px; border-radius: 4px; }
-            .alert-error { background-color: #f8d7da; color: #721c24; border: 1px solid #f5c6cb; }
-            .alert-success { background-color: #d4edda; color: #155724; border: 1px solid #c3e6cb; }
-            h1 { text-align: center; color: #333; }
-        </style>
-    </head>
-    <body>
-        <h1>Kesgrave CMS</h1>
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ category }}">{{ message }}</div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-        
-        <form method="POST">
-            <div class="form-group">
-                <label for="username">Username:</label>
-                <input type="text" id="username" name="username" required>
-            </div>
-            <div class="form-group">
-                <label for="password">Password:</label>
-                <input type="password" id="password" name="password" required>
-            </div>
-            <button type="submit">Login</button>
-        </form>
-        
-        <div style="margin-top: 20px; text-align: center; color: #666; font-size: 12px;">
-            <p>Default credentials: admin / admin123</p>
-            <p>Database: {{ db_path }}</p>
-        </div>
-    </body>
-    </html>
-    ''', db_path=db_path)
-
-@app.route('/logout')
+    return render_template('cms/login.html', db_path=current_app.config['DB_PATH'])
+
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Logged out successfully!', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
+
+# Dashboard and health counts - one query, cached for a few seconds and
+# refreshed by any committed Event/Meeting/Slide write
+STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 10))
 
-@app.route('/dashboard')
+def get_stats():
+    return cache.get_or_set('stats', lambda: count_rows(db, Event, Meeting, Slide),
+                            ('Event', 'Meeting', 'Slide'), STATS_CACHE_TTL)
+
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     # Get counts for dashboard
-    event_count = Event.query.count()
-    meeting_count = Meeting.query.count()
-    slide_count = Slide.query.count()
+    stats = get_stats()
     
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Kesgrave CMS - Dashboard</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }
-            .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 30px; }
-            .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
-            .stat-card { background: #f8f9fa; padding: 20px; border-radius: 8px; text-align: center; }
-            .stat-number { font-size: 2em; font-weight: bold; color: #007bff; }
-            .stat-label { color: #666; margin-top: 5px; }
-            .actions { display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 20px; }
-            .action-card { background: white; border: 1px solid #ddd; border-radius: 8px; padding: 20px; }
-            .action-card h3 { margin-top: 0; color: #333; }
-            .btn { display: inline-block; padding: 8px 16px; background-color: #007bff; color: white; text-decoration: none; border-radius: 4px; margin: 5px; }
-            .btn:hover { background-color: #0056b3; }
-            .btn-secondary { background-color: #6c757d; }
-            .btn-secondary:hover { background-color: #545b62; }
-            .logout { background-color: #dc3545; color: white; text-decoration: none; padding: 8px 16px; border-radius: 4px; }
-            .logout:hover { background-color: #c82333; }
-            h1 { color: #333; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Kesgrave CMS Dashboard</h1>
-            <a href="/logout" class="logout">Logout</a>
-        </div>
-        
-        <div class="stats">
-            <div class="stat-card">
-                <div class="stat-number">{{ event_count }}</div>
-                <div class="stat-label">Events</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{{ meeting_count }}</div>
-                <div class="stat-label">Meetings</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{{ slide_count }}</div>
-                <div class="stat-label">Slides</div>
-            </div>
-        </div>
-        
-        <div class="actions">
-            <div class="action-card">
-                <h3>Events Management</h3>
-                <p>Manage community events and activities.</p>
-                <a href="/events" class="btn">View Events</a>
-                <a href="/events/add" class="btn">Add Event</a>
-            </div>
-            
-            <div class="action-card">
-                <h3>Meetings Management</h3>
-                <p>Manage council meetings and agendas.</p>
-                <a href="/meetings" class="btn">View Meetings</a>
-                <a href="/meetings/add" class="btn">Add Meeting</a>
-            </div>
-            
-            <div class="action-card">
-                <h3>Homepage Slides</h3>
-                <p>Manage homepage slider content.</p>
-                <a href="/slides" class="btn">View Slides</a>
-                <a href="/slides/add" class="btn">Add Slide</a>
-            </div>
-            
-            <div class="action-card">
-                <h3>Database Info</h3>
-                <p>Database: {{ db_path }}</p>
-                <a href="/health" class="btn btn-secondary">Health Check</a>
-            </div>
-        </div>
-    </body>
-    </html>
-    ''', event_count=event_count, meeting_count=meeting_count, slide_count=slide_count, db_path=db_path)
-
-@app.route('/health')
+    return render_template('cms/dashboard.html', event_count=stats['Event'], meeting_count=stats['Meeting'], slide_count=stats['Slide'], db_path=current_app.config['DB_PATH'], job_status=jobs.summary())
+
+@bp.route('/health/live')
+def liveness_check():
+    """Liveness probe for the load balancer - never touches the database"""
+    return jsonify({"status": "alive"}), 200
+
+@bp.route('/health')
 def health_check():
     try:
         # Test database connection
-        event_count = Event.query.count()
-        meeting_count = Meeting.query.count()
-        slide_count = Slide.query.count()
+        stats = get_stats()
         
         return jsonify({
             "status": "healthy",
             "database": "connected",
-            "database_path": db_path,
+            "database_path": current_app.config['DB_PATH'],
             "counts": {
-                "events": event_count,
-                "meetings": meeting_count,
-                "slides": slide_count
+                "events": stats['Event'],
+                "meetings": stats['Meeting'],
+                "slides": stats['Slide']
             },
             "timestamp": datetime.utcnow().isoformat()
         }), 200
@@ -260,150 +258,228 @@ def health_check():
         return jsonify({
             "status": "unhealthy", 
             "error": str(e),
-            "database_path": db_path,
+            "database_path": current_app.config['DB_PATH'],
             "timestamp": datetime.utcnow().isoformat()
         }), 500
 
-@app.route('/events')
+# Public API
+@bp.route('/api/homepage')
+@cache.cached(*HOMEPAGE_TAGS, ttl=HOMEPAGE_CACHE_TTL)
+@conditional(Slide, Event, Meeting, extra=today)
+def api_homepage():
+    """Everything the homepage needs in one request"""
+    return jsonify(get_homepage_payload())
+
+@bp.route('/api/homepage/<section>')
+@cache.cached(*HOMEPAGE_TAGS, ttl=HOMEPAGE_CACHE_TTL)
+@conditional(Slide, Event, Meeting, extra=today)
+def api_homepage_section(section):
+    key = section.replace('-', '_')
+    payload = get_homepage_payload()
+    if key not in payload or key == 'generated_at':
+        return jsonify({'error': 'Unknown homepage section'}), 404
+    return jsonify(payload[key])
+
+@bp.route('/images/<digest>/<name>')
+def slide_image(digest, name):
+    """Slide image derivative - content-addressed, so cached as immutable"""
+    return images.send(digest, name)
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date, e.g. 2025-07-01')
+
+@bp.route('/api/events')
+@cache.cached('Event')
+@conditional(Event)
+def api_events():
+    """Events in a date window: ?from=2025-07-01&to=2025-08-01&category=Community (to is exclusive)"""
+    try:
+        start = parse_date_arg('from')
+        end = parse_date_arg('to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filters = []
+    if start:
+        filters.append(Event.date >= start)
+    if end:
+        filters.append(Event.date < end)
+    if request.args.get('category'):
+        filters.append(Event.category == request.args['category'])
+    return keyset_response(Event, ['id', 'title', 'description', 'date', 'location', 'category'], ['date', 'id'], filters=filters)
+
+@bp.route('/api/events/upcoming')
+@cache.cached('Event', ttl=HOMEPAGE_CACHE_TTL)
+@conditional(Event, extra=today)
+def api_events_upcoming():
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    events = Event.query.filter(Event.date >= datetime.utcnow()).order_by(Event.date.asc(), Event.id.asc()).limit(limit).all()
+    return json_response(json_list(Event, events, event_to_dict, 'event'))
+
+def build_event_month_counts():
+    month = func.strftime('%Y-%m', Event.date)
+    rows = db.session.query(month, func.count(Event.id)).group_by(month).order_by(month).all()
+    return [{'month': m, 'count': count} for m, count in rows]
+
+@bp.route('/api/events/months')
+@cache.cached('Event')
+@conditional(Event)
+def api_event_months():
+    """Number of events per month, for the calendar navigation"""
+    return jsonify(build_event_month_counts())
+
+@bp.route('/events')
 @login_required
 def list_events():
     events = Event.query.order_by(Event.date.desc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Events - Kesgrave CMS</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }
-            .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; }
-            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
-            th { background-color: #f8f9fa; }
-            .btn { display: inline-block; padding: 6px 12px; background-color: #007bff; color: white; text-decoration: none; border-radius: 4px; margin: 2px; }
-            .btn:hover { background-color: #0056b3; }
-            .btn-danger { background-color: #dc3545; }
-            .btn-danger:hover { background-color: #c82333; }
-            h1 { color: #333; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Events ({{ event_count }})</h1>
-            <div>
-                <a href="/events/add" class="btn">Add New Event</a>
-                <a href="/dashboard" class="btn" style="background-color: #6c757d;">Back to Dashboard</a>
-            </div>
-        </div>
-        
-        {% if events %}
-        <table>
-            <thead>
-                <tr>
-                    <th>Title</th>
-                    <th>Date</th>
-                    <th>Location</th>
-                    <th>Actions</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for event in events %}
-                <tr>
-                    <td>{{ event.title }}</td>
-                    <td>{{ event.date.strftime('%Y-%m-%d %H:%M') if event.date }}</td>
-                    <td>{{ event.location or 'N/A' }}</td>
-                    <td>
-                        <a href="/events/edit/{{ event.id }}" class="btn">Edit</a>
-                        <a href="/events/delete/{{ event.id }}" class="btn btn-danger" onclick="return confirm('Are you sure?')">Delete</a>
-                    </td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-        {% else %}
-        <p>No events found. <a href="/events/add">Add the first event</a>.</p>
-        {% endif %}
-    </body>
-    </html>
-    ''', events=events, event_count=len(events))
-
-@app.route('/meetings')
+    return render_template('cms/events.html', events=events, event_count=len(events))
+
+@bp.route('/meetings')
 @login_required
 def list_meetings():
     meetings = Meeting.query.order_by(Meeting.date.desc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Meetings - Kesgrave CMS</title>
-        <style>
-            body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; }
-            .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; }
-            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
-            th { background-color: #f8f9fa; }
-            .btn { display: inline-block; padding: 6px 12px; background-color: #007bff; color: white; text-decoration: none; border-radius: 4px; margin: 2px; }
-            .btn:hover { background-color: #0056b3; }
-            .btn-danger { background-color: #dc3545; }
-            .btn-danger:hover { background-color: #c82333; }
-            h1 { color: #333; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Meetings ({{ meeting_count }})</h1>
-            <div>
-                <a href="/meetings/add" class="btn">Add New Meeting</a>
-                <a href="/dashboard" class="btn" style="background-color: #6c757d;">Back to Dashboard</a>
-            </div>
-        </div>
-        
-        {% if meetings %}
-        <table>
-            <thead>
-                <tr>
-                    <th>Title</th>
-                    <th>Date</th>
-                    <th>Location</th>
-                    <th>Actions</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for meeting in meetings %}
-                <tr>
-                    <td>{{ meeting.title }}</td>
-                    <td>{{ meeting.date.strftime('%Y-%m-%d %H:%M') if meeting.date }}</td>
-                    <td>{{ meeting.location or 'N/A' }}</td>
-                    <td>
-                        <a href="/meetings/edit/{{ meeting.id }}" class="btn">Edit</a>
-                        <a href="/meetings/delete/{{ meeting.id }}" class="btn btn-danger" onclick="return confirm('Are you sure?')">Delete</a>
-                    </td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-        {% else %}
-        <p>No meetings found. <a href="/meetings/add">Add the first meeting</a>.</p>
-        {% endif %}
-    </body>
-    </html>
-    ''', meetings=meetings, meeting_count=len(meetings))
-
-# Create tables and ensure database exists
-with app.app_context():
-    try:
-        db.create_all()
-        print("✅ Database tables created/verified successfully")
-        
-        # Test database connection
-        event_count = Event.query.count()
-        meeting_count = Meeting.query.count()
-        slide_count = Slide.query.count()
-        print(f"📊 Database stats - Events: {event_count}, Meetings: {meeting_count}, Slides: {slide_count}")
-        
-    except Exception as e:
-        print(f"❌ Error with database: {e}")
+    return render_template('cms/meetings.html', meetings=meetings, meeting_count=len(meetings))
+
+# Calendar subscription feeds. Calendar apps poll these constantly: the
+# rendered feed is cached until an Event/Meeting write (or the day changes)
+# and polls carrying the ETag get a 304 for the price of one version query.
+CALENDAR_PAST_DAYS = int(os.environ.get('CALENDAR_PAST_DAYS', 90))
+CALENDAR_CACHE_TTL = int(os.environ.get('CALENDAR_CACHE_TTL', 3600))
+
+def calendar_window_start():
+    start = datetime.utcnow() - timedelta(days=CALENDAR_PAST_DAYS)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def slugify(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+@bp.route('/calendar/events.ics')
+@cache.cached('Event', ttl=CALENDAR_CACHE_TTL)
+@conditional(Event, extra=today)
+def calendar_events():
+    events = Event.query.filter(Event.date >= calendar_window_start()).order_by(Event.date.asc(), Event.id.asc()).all()
+    return calendar_response(events, 'Kesgrave Town Council Events')
+
+@bp.route('/calendar/meetings/<meeting_type>.ics')
+@cache.cached('Meeting', ttl=CALENDAR_CACHE_TTL)
+@conditional(Meeting, extra=today)
+def calendar_meetings(meeting_type):
+    """One feed per kind of meeting (its title, slugified - e.g. full-council), or 'all'"""
+    titles = [title for (title,) in db.session.query(Meeting.title).distinct()
+              if meeting_type == 'all' or slugify(title) == meeting_type]
+    if not titles and meeting_type != 'all':
+        return jsonify({'error': 'Unknown meeting type'}), 404
+
+    meetings = Meeting.query.filter(Meeting.title.in_(titles), Meeting.date >= calendar_window_start()) \
+        .order_by(Meeting.date.asc(), Meeting.id.asc()).all()
+    name = 'Kesgrave Town Council Meetings' if meeting_type == 'all' else f'Kesgrave Town Council - {titles[0]}'
+    return calendar_response(meetings, name)
+
+# Bulk import (upsert on title + date) and streamed export - see bulk.py
+@bp.route('/events/import', methods=['POST'])
+@login_required
+def import_events():
+    return import_response(db, Event, cache)
+
+@bp.route('/events/export')
+@login_required
+def export_events():
+    return export_response(Event)
+
+@bp.route('/meetings/import', methods=['POST'])
+@login_required
+def import_meetings():
+    return import_response(db, Meeting, cache)
+
+@bp.route('/meetings/export')
+@login_required
+def export_meetings():
+    return export_response(Meeting)
+
+def publish_targets():
+    """Public payloads written as static JSON by publish.py, with the models each depends on"""
+    targets = [('/api/homepage', HOMEPAGE_TAGS)]
+    targets += [(f'/api/homepage/{section}', HOMEPAGE_TAGS) for section in ('slides', 'events', 'meetings', 'quick-links')]
+    targets += [
+        ('/api/events?limit=200', ('Event',)),
+        ('/api/events/upcoming', ('Event',)),
+        ('/api/events/months', ('Event',)),
+    ]
+    return targets
+
+def setup_database():
+    """One-off schema setup - run by 'flask init-db' or the gunicorn preload hook, never by workers"""
+    # create_all() plus columns/indexes it never adds to existing tables
+    upgrade(db)
+    print("✅ Database tables created/verified successfully")
+    
+    # Test database connection
+    stats = count_rows(db, Event, Meeting, Slide)
+    print(f"📊 Database stats - Events: {stats['Event']}, Meetings: {stats['Meeting']}, Slides: {stats['Slide']}")
+
+def create_app(config=None):
+    """
+    Application factory. Building the app does no database I/O at all, so
+    gunicorn workers start instantly; schema setup is a separate step
+    (prepare_database / 'flask init-db').
+    """
+    app = Flask(__name__)
+
+    # Configuration
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'kesgrave-cms-secret-key-2025')
+    app.config['DB_PATH'] = database_path()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{app.config['DB_PATH']}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if config:
+        app.config.update(config)
+
+    # WAL mode, connection pragmas and pool sizing (see db_profile.py)
+    configure_database(app)
+
+    # Admin templates from cms/templates with a bytecode cache (see templating.py)
+    configure_templates(app)
+
+    db.init_app(app)
+    cache.init_app(app, db)
+    # Server-Timing headers and /metrics when INSTRUMENTATION=1 (see instrumentation.py)
+    instrumentation.init_app(app, db)
+    # Post-commit work runs as background jobs, not in the request (see jobs.py)
+    jobs.init_app(app, db)
+    # Static JSON snapshots for a CDN when PUBLISH_DIR is set (see publish.py)
+    publisher.init_app(app, cache, publish_targets, jobs)
+    # Per-row JSON fragments (see fragments.py) follow cache invalidations
+    cache.on_invalidate(fragments.invalidate)
+    # Responsive slide image derivatives built after Slide commits (see images.py)
+    images.init_app(app, cache, Slide, jobs=jobs)
+    # Tunable password hashing and login rate limits (see passwords.py)
+    passwords.init_app(app)
+    login_throttle.init_app(app)
+    login_manager.init_app(app)
+    register_cli(app, db, setup_database)
+    register_bulk_cli(app, db, {'events': Event, 'meetings': Meeting}, cache)
+
+    # Enable CORS
+    CORS(app, origins=[
+        os.environ.get('FRONTEND_URL', 'http://localhost:3000'),
+        'https://kesgrave-cms.onrender.com',
+        'https://kesgravetowncouncil.onrender.com'
+    ])
+
+    app.register_blueprint(bp)
+    return app
 
 if __name__ == '__main__':
+    app = create_app()
+    print(f"📁 Using database path: {app.config['DB_PATH']}")
+    prepare_database(app, db, setup_database)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
-
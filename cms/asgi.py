@@ -0,0 +1,259 @@
+"""
+Async read-only public API (ASGI)
+
+The Flask app gives every request a worker thread, so thousands of idle
+keep-alive connections from the public site tie up the whole pool. This
+module serves the same public read endpoints from one asyncio event loop:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8001 --workers 2
+
+It reuses the models, serializers, keyset pagination and ETag logic of
+app.py, but reads through SQLAlchemy's asyncio engine on the aiosqlite driver
+with a bounded connection pool (ASYNC_DB_POOL_SIZE, default 10). Requests
+queue for a connection instead of opening more. Admin pages and every write
+stay on the Flask app (main.py); both point at the same SQLite file
+(DATABASE_PATH), which WAL mode lets them share.
+
+Every response carries the same ETag the Flask routes would send. A matching
+If-None-Match gets a 304 after one version query, and rendered bodies are
+kept in a small LRU keyed by that ETag, so a body is only rebuilt after the
+data behind it changes - no cross-process invalidation needed. Date-dependent
+bodies ("upcoming" lists) are also keyed by the date and, like the Flask
+homepage cache, expire after HOMEPAGE_CACHE_TTL so started events drop out.
+
+Needs starlette, uvicorn and aiosqlite (see requirements.txt).
+"""
+
+import os
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import Flask
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app import (Event, Meeting, Slide, database_path, event_to_dict, meeting_to_dict, slide_to_dict, images,
+                 QUICK_LINKS, HOMEPAGE_CACHE_TTL, HOMEPAGE_EVENT_LIMIT, HOMEPAGE_MEETING_LIMIT)
+from cache import MemoryBackend
+from conditional import make_etag, today, version_statement, versions_from_row
+from db_profile import apply_pragmas, sqlite_pragmas
+from pagination import decode_cursor, keyset_statement, page_rows, parse_fields, parse_limit, requested_limit
+
+POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 10))
+POOL_TIMEOUT = int(os.environ.get('ASYNC_DB_POOL_TIMEOUT', 10))
+BODY_CACHE_ENTRIES = int(os.environ.get('ASYNC_BODY_CACHE_ENTRIES', 256))
+
+HOMEPAGE_MODELS = (Slide, Event, Meeting)
+EVENT_FIELDS = ['id', 'title', 'description', 'date', 'location', 'category']
+
+engine = create_async_engine(
+    f'sqlite+aiosqlite:///{database_path()}',
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=0,
+    pool_timeout=POOL_TIMEOUT,
+)
+
+# Same WAL / busy_timeout / cache pragmas as the Flask app (db_profile.py)
+_pragmas = sqlite_pragmas()
+if _pragmas:
+    event.listen(engine.sync_engine, 'connect', lambda conn, record: apply_pragmas(conn, _pragmas))
+
+bodies = MemoryBackend(BODY_CACHE_ENTRIES)
+
+# Slide image derivatives from the same directory the Flask factory uses
+# (IMAGE_DIR, default <instance path>/images), so both APIs return the same slides
+images.configure({}, Flask('app').instance_path)
+
+
+def error(message, status=400):
+    return JSONResponse({'error': message}, status_code=status)
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('if-none-match', '')
+    tags = [t.strip().removeprefix('W/').strip('"') for t in header.split(',')]
+    return etag in tags or '*' in tags
+
+
+def full_path(request):
+    # Matches Flask's request.full_path, so both apps hand out the same ETags
+    return f'{request.url.path}?{request.url.query}'
+
+
+async def conditional(request, models, build, extra=None):
+    """
+    ETag/304 handling plus the ETag-keyed body cache. `build(conn)` returns
+    (payload, headers) or a ready Response for errors.
+    """
+    async with engine.connect() as conn:
+        row = (await conn.execute(version_statement(*models))).one()
+        versions = versions_from_row(row)
+        extra_value = extra() if extra else None
+        etag = make_etag(versions, extra_value, path=full_path(request))
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        key = (etag, extra_value)
+        cached = bodies.get(key)
+        if cached is None:
+            result = await build(conn)
+            if isinstance(result, Response):
+                return result
+            payload, extra_headers = result
+            cached = (JSONResponse(payload).body, extra_headers)
+            bodies.set(key, cached, ttl=HOMEPAGE_CACHE_TTL if extra else None)
+
+    body, extra_headers = cached
+    return Response(body, media_type='application/json', headers=dict(headers, **extra_headers))
+
+
+# Homepage
+async def homepage_payload(conn):
+    now = datetime.utcnow()
+    slides = (await conn.execute(
+        select(Slide).where(Slide.is_active.is_(True)).order_by(Slide.sort_order.asc(), Slide.id.asc())
+    )).all()
+    events = (await conn.execute(
+        select(Event).where(Event.date >= now).order_by(Event.date.asc()).limit(HOMEPAGE_EVENT_LIMIT)
+    )).all()
+    meetings = (await conn.execute(
+        select(Meeting).where(Meeting.date >= now).order_by(Meeting.date.asc()).limit(HOMEPAGE_MEETING_LIMIT)
+    )).all()
+    # Core rows expose the same attribute names the serializers read
+    return {
+        'slides': [slide_to_dict(s) for s in slides],
+        'events': [event_to_dict(e) for e in events],
+        'meetings': [meeting_to_dict(m) for m in meetings],
+        'quick_links': QUICK_LINKS,
+        'generated_at': now.isoformat()
+    }
+
+
+async def api_homepage(request):
+    async def build(conn):
+        return await homepage_payload(conn), {}
+    return await conditional(request, HOMEPAGE_MODELS, build, extra=today)
+
+
+async def api_homepage_section(request):
+    key = request.path_params['section'].replace('-', '_')
+
+    async def build(conn):
+        payload = await homepage_payload(conn)
+        if key not in payload or key == 'generated_at':
+            return error('Unknown homepage section', 404)
+        return payload[key], {}
+    return await conditional(request, HOMEPAGE_MODELS, build, extra=today)
+
+
+# Events
+def parse_date_arg(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date, e.g. 2025-07-01')
+
+
+async def api_events(request):
+    """Events in a date window: ?from=2025-07-01&to=2025-08-01&category=Community (to is exclusive)"""
+    args = request.query_params
+    try:
+        start = parse_date_arg(request, 'from')
+        end = parse_date_arg(request, 'to')
+        fields = parse_fields(Event, args.get('fields'), EVENT_FIELDS)
+        limit = requested_limit(args)
+        after = decode_cursor(Event, ['date', 'id'], args.get('after'))
+    except ValueError as e:
+        return error(str(e))
+
+    filters = []
+    if start:
+        filters.append(Event.date >= start)
+    if end:
+        filters.append(Event.date < end)
+    if args.get('category'):
+        filters.append(Event.category == args['category'])
+
+    async def build(conn):
+        statement = keyset_statement(Event, fields, ['date', 'id'], after, filters=filters,
+                                     limit=None if limit is None else limit + 1)
+        rows, next_cursor = page_rows((await conn.execute(statement)).all(), fields, ['date', 'id'], limit)
+        headers = {}
+        if next_cursor:
+            query = dict(args, after=next_cursor)
+            headers['X-Next-Cursor'] = next_cursor
+            headers['Link'] = f'<{request.url.replace(query=urlencode(query))}>; rel="next"'
+        return rows, headers
+    return await conditional(request, (Event,), build)
+
+
+async def api_events_upcoming(request):
+    try:
+        limit = parse_limit(request.query_params.get('limit'))
+    except ValueError as e:
+        return error(str(e))
+
+    async def build(conn):
+        events = (await conn.execute(
+            select(Event).where(Event.date >= datetime.utcnow()).order_by(Event.date.asc(), Event.id.asc()).limit(limit)
+        )).all()
+        return [event_to_dict(e) for e in events], {}
+    return await conditional(request, (Event,), build, extra=today)
+
+
+async def api_event_months(request):
+    """Number of events per month, for the calendar navigation"""
+    async def build(conn):
+        month = func.strftime('%Y-%m', Event.date)
+        rows = (await conn.execute(
+            select(month, func.count(Event.id)).group_by(month).order_by(month)
+        )).all()
+        return [{'month': m, 'count': count} for m, count in rows], {}
+    return await conditional(request, (Event,), build)
+
+
+async def liveness_check(request):
+    """Liveness probe for the load balancer - never touches the database"""
+    return JSONResponse({'status': 'alive'})
+
+
+async def close_engine():
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/health/live', liveness_check),
+        Route('/api/homepage', api_homepage),
+        Route('/api/homepage/{section}', api_homepage_section),
+        Route('/api/events', api_events),
+        Route('/api/events/upcoming', api_events_upcoming),
+        Route('/api/events/months', api_event_months),
+    ],
+    middleware=[
+        # Same origins as the Flask app; read-only, so GET only
+        Middleware(CORSMiddleware, allow_origins=[
+            os.environ.get('FRONTEND_URL', 'http://localhost:3000'),
+            'https://kesgrave-cms.onrender.com',
+            'https://kesgravetowncouncil.onrender.com'
+        ], allow_methods=['GET'], expose_headers=['ETag', 'X-Next-Cursor', 'Link']),
+    ],
+    on_shutdown=[close_engine],
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8001)))
@@ -0,0 +1,280 @@
+"""
+Bulk import and export of events and meetings (CSV, JSON, iCalendar)
+
+Imports are all-or-nothing: every row is validated first, then existing rows
+are matched on the natural key (title, date) with one query, and the new and
+changed rows are written with batched executemany INSERTs and UPDATEs in a
+single transaction. Rows already present are updated rather than duplicated,
+so re-importing the same calendar is safe; only the fields the file actually
+has are written to them, so e.g. a feed without CATEGORIES keeps each
+event's existing category.
+
+    result = import_rows(db, Meeting, parse_upload(data, 'csv'))
+    return export_response(Meeting, 'ics')
+
+Bulk statements bypass the session's unit of work, so the cache's
+after_flush hook never sees them - callers invalidate the model's cache tag
+themselves (import_response does this).
+
+    flask --app main import-data meetings calendar.ics
+    flask --app main export-data events --format csv > events.csv
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+import click
+from flask import Response, jsonify, request, stream_with_context
+from sqlalchemy import insert, update
+
+from ical import iter_calendar, parse_ics, row_vevent
+from streaming import YIELD_PER, iter_json_array
+
+FORMATS = ('csv', 'json', 'ics')
+FIELDS = ('title', 'description', 'date', 'location', 'category')
+NATURAL_KEY = ('title', 'date')
+BATCH_SIZE = 1000
+MAX_ERRORS = 20
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'ics': 'text/calendar',
+}
+
+
+class BulkImportError(ValueError):
+    """Raised with a list of per-row problems; nothing has been written"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid row(s)')
+        self.errors = errors
+
+
+def model_fields(model):
+    columns = model.__table__.columns.keys()
+    return [f for f in FIELDS if f in columns]
+
+
+def detect_format(filename=None, mimetype=None, explicit=None):
+    if explicit:
+        if explicit not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        return explicit
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if ext in FORMATS:
+        return ext
+    if ext == 'ical':
+        return 'ics'
+    for fmt, mime in MIMETYPES.items():
+        if mimetype and mimetype.startswith(mime):
+            return fmt
+    raise ValueError('Could not tell the file format - pass ?format=csv|json|ics')
+
+
+def parse_upload(data, fmt):
+    """Decode an uploaded file into a list of dicts (values still unvalidated)"""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(data)))
+    if fmt == 'json':
+        rows = json.loads(data)
+        if not isinstance(rows, list):
+            raise ValueError('JSON imports must be a list of objects')
+        return rows
+    return parse_ics(data)
+
+
+def clean_row(row, fields):
+    """Validate and normalise one row; returns (values, error). Fields the row doesn't have are left out."""
+    if not isinstance(row, dict):
+        return None, 'not an object'
+    values = {}
+    for field in fields:
+        if field not in row:
+            continue
+        value = row[field]
+        if isinstance(value, str):
+            value = value.strip() or None
+        values[field] = value
+
+    if not values.get('title'):
+        return None, 'title is required'
+    if not values.get('date'):
+        return None, 'date is required'
+    if not isinstance(values['date'], datetime):
+        try:
+            values['date'] = datetime.fromisoformat(str(values['date']).replace('Z', ''))
+        except ValueError:
+            return None, f"date {values['date']!r} is not an ISO date"
+    if 'description' in values and values['description'] is None:
+        values['description'] = ''  # NOT NULL on Event
+    return values, None
+
+
+def import_rows(db, model, rows):
+    """
+    Upsert `rows` into `model` on (title, date) in one transaction.
+    Returns {'inserted': n, 'updated': n}; raises BulkImportError if any row is invalid.
+    """
+    fields = model_fields(model)
+    cleaned = {}
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        values, error = clean_row(row, fields)
+        if error:
+            errors.append({'row': number, 'error': error})
+            if len(errors) >= MAX_ERRORS:
+                break
+            continue
+        # Later rows with the same key win
+        cleaned[tuple(values[k] for k in NATURAL_KEY)] = values
+    if errors:
+        raise BulkImportError(errors)
+    if not cleaned:
+        return {'inserted': 0, 'updated': 0}
+
+    # Existing rows in the imported date range, matched in Python on the key
+    dates = [key[1] for key in cleaned]
+    existing = {
+        (title, date): id
+        for id, title, date in db.session.query(model.id, model.title, model.date)
+        .filter(model.date >= min(dates), model.date <= max(dates))
+    }
+
+    now = datetime.utcnow()
+    blank = {field: None for field in fields}
+    if 'description' in blank:
+        blank['description'] = ''
+    inserts, shapes = [], {}
+    for key, values in cleaned.items():
+        if key in existing:
+            # Grouped by the fields present - one executemany per shape
+            shapes.setdefault(tuple(sorted(values)), []).append(dict(values, id=existing[key]))
+        else:
+            inserts.append(dict(blank, **values))
+    updates = [values for group in shapes.values() for values in group]
+    # Bulk UPDATEs skip onupdate=; without a new updated_at the ETags and
+    # row fragments of edited rows would never change
+    if 'updated_at' in model.__table__.columns:
+        for values in inserts + updates:
+            values['updated_at'] = now
+
+    try:
+        for start in range(0, len(inserts), BATCH_SIZE):
+            db.session.execute(insert(model), inserts[start:start + BATCH_SIZE])
+        for group in shapes.values():
+            for start in range(0, len(group), BATCH_SIZE):
+                db.session.execute(update(model), group[start:start + BATCH_SIZE])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'inserted': len(inserts), 'updated': len(updates)}
+
+
+def import_response(db, model, cache=None):
+    """
+    View helper: import the uploaded file (multipart field 'file', or the raw
+    request body) and return a JSON summary.
+    """
+    upload = request.files.get('file')
+    try:
+        if upload:
+            fmt = detect_format(upload.filename, upload.mimetype, request.args.get('format'))
+            data = upload.read()
+        else:
+            fmt = detect_format(None, request.mimetype, request.args.get('format'))
+            data = request.get_data()
+        rows = parse_upload(data, fmt)
+        result = import_rows(db, model, rows)
+    except BulkImportError as e:
+        return jsonify({'error': str(e), 'rows': e.errors}), 400
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if cache is not None and (result['inserted'] or result['updated']):
+        cache.invalidate(model.__name__)
+    return jsonify(dict(result, format=fmt)), 200
+
+
+def serialize_row(obj, fields):
+    row = {}
+    for field in ['id'] + fields:
+        value = getattr(obj, field)
+        row[field] = value.isoformat() if isinstance(value, datetime) else value
+    return row
+
+
+def _iter_csv(objects, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id'] + fields)
+    for i, obj in enumerate(objects, start=1):
+        row = serialize_row(obj, fields)
+        writer.writerow([row[f] for f in ['id'] + fields])
+        if i % 100 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_export(model, fmt, query=None):
+    """Text chunks of `model` rows (ordered by date) in the given format"""
+    fields = model_fields(model)
+    query = query if query is not None else model.query.order_by(model.date.asc(), model.id.asc())
+    objects = query.yield_per(YIELD_PER)
+    if fmt == 'csv':
+        return _iter_csv(objects, fields)
+    if fmt == 'ics':
+        return iter_calendar(objects, row_vevent, f'Kesgrave {model.__name__}s')
+    return iter_json_array(serialize_row(obj, fields) for obj in objects)
+
+
+def export_response(model, fmt=None):
+    """View helper: stream every row of `model` as ?format=csv|json|ics"""
+    try:
+        fmt = detect_format(explicit=fmt or request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filename = f'{model.__tablename__}s.{fmt}'
+    return Response(stream_with_context(iter_export(model, fmt)), mimetype=MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+def register_bulk_cli(app, db, models, cache=None):
+    """`flask import-data <kind> <file>` / `flask export-data <kind>`; models = {'events': Event, ...}"""
+    kinds = click.Choice(sorted(models))
+
+    @app.cli.command('import-data')
+    @click.argument('kind', type=kinds)
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension')
+    def import_data_command(kind, path, fmt):
+        """Bulk import (upsert) events or meetings from a CSV, JSON or .ics file."""
+        model = models[kind]
+        with open(path, 'rb') as f:
+            rows = parse_upload(f.read(), detect_format(path, explicit=fmt))
+        try:
+            result = import_rows(db, model, rows)
+        except BulkImportError as e:
+            for problem in e.errors:
+                print(f"❌ Row {problem['row']}: {problem['error']}")
+            raise SystemExit(1)
+        if cache is not None:
+            cache.invalidate(model.__name__)
+        print(f"✅ Imported {kind}: {result['inserted']} inserted, {result['updated']} updated")
+
+    @app.cli.command('export-data')
+    @click.argument('kind', type=kinds)
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+    @click.option('--output', '-o', type=click.File('w'), default='-')
+    def export_data_command(kind, fmt, output):
+        """Export every event or meeting as CSV, JSON or .ics."""
+        for chunk in iter_export(models[kind], fmt):
+            output.write(chunk)
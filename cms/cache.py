@@ -0,0 +1,319 @@
+"""
+Process-wide cache for public read routes, invalidated by model tags
+
+    cache = Cache()
+    cache.init_app(app, db)
+
+    @app.route('/api/pages')
+    @cache.cached('Page')
+    def api_pages():
+        ...
+
+Every entry is stored with the model names it was built from. After each
+successful db.session commit, the names of the models that were inserted,
+updated or deleted are purged, so admin writes (add_page, update_page,
+add_news, add_event, ...) drop exactly the entries that depend on them.
+
+Backends (CACHE_BACKEND config / env var):
+  memory  - LRU dict per process (default)
+  file    - shared directory (CACHE_DIR) so all gunicorn workers see the same
+            entries and the same invalidations
+
+Both keep at most CACHE_MAX_ENTRIES entries (least recently used go first),
+and entries stored without an explicit ttl expire after CACHE_DEFAULT_TTL
+seconds (default 300) so a missed invalidation can't last forever.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # Windows - per-process lock only, fine for local development
+    fcntl = None
+
+from flask import request, make_response
+from sqlalchemy import event
+
+DEFAULT_TTL = 300
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, tags, expires_at)
+        self._tags = {}  # tag -> set of keys
+        self._generations = {}  # tag -> number of times it has been invalidated
+        self._lock = threading.Lock()
+
+    def snapshot(self, tags):
+        with self._lock:
+            return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, tags, expires_at = entry
+            if expires_at is not None and time.monotonic() > expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), ttl=None, snapshot=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if snapshot and any(self._generations.get(t, 0) != v for t, v in snapshot.items()):
+                # Invalidated while the value was being built - don't store it
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, tuple(tags), expires_at)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._generations.clear()
+
+    def _remove(self, key):
+        value, tags, expires_at = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class FileBackend:
+    """
+    Entries are pickled to one file each; every tag has a version counter file.
+    An entry records the tag versions it was built against, and invalidating a
+    tag just bumps its counter, so every worker sees the purge on its next read.
+
+    Counters are bumped under an exclusive lock file so concurrent workers
+    can't lose an increment. Stale and expired entries are deleted when read,
+    and every PRUNE_EVERY writes the least recently used entries beyond
+    max_entries are removed (a hit refreshes the file's mtime).
+    """
+
+    PRUNE_EVERY = 64
+
+    def __init__(self, directory, max_entries=2048):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.tag_directory = os.path.join(directory, 'tags')
+        os.makedirs(self.tag_directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.cache')
+
+    def _tag_path(self, tag):
+        return os.path.join(self.tag_directory, tag)
+
+    def _tag_version(self, tag):
+        try:
+            with open(self._tag_path(tag)) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write(self, path, data):
+        # Write then rename so readers in other workers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, value, versions, expires_at = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            return None
+        if stored_key != key:
+            return None
+        if (expires_at is not None and time.time() > expires_at) or \
+                any(self._tag_version(tag) != version for tag, version in versions.items()):
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)  # recently used - pruned last
+        except OSError:
+            pass
+        return value
+
+    def snapshot(self, tags):
+        return {tag: self._tag_version(tag) for tag in tags}
+
+    def set(self, key, value, tags=(), ttl=None, snapshot=None):
+        # Storing the versions seen before the value was built means a purge
+        # that lands mid-build leaves the new entry already stale.
+        versions = snapshot if snapshot is not None else self.snapshot(tags)
+        expires_at = time.time() + ttl if ttl else None
+        self._write(self._entry_path(key), pickle.dumps((key, value, versions, expires_at)))
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Remove the least recently used entries beyond max_entries"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            self._discard(path)
+
+    def invalidate(self, tags):
+        with self._lock, open(os.path.join(self.tag_directory, '.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                for tag in tags:
+                    self._write(self._tag_path(tag), str(self._tag_version(tag) + 1).encode())
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class Cache:
+    def __init__(self, app=None, db=None):
+        self.backend = MemoryBackend()
+        self.default_ttl = DEFAULT_TTL
+        self._listening = False
+        self._invalidation_listeners = []
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        backend = app.config.get('CACHE_BACKEND', os.environ.get('CACHE_BACKEND', 'memory'))
+        if backend == 'file':
+            directory = app.config.get('CACHE_DIR', os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kesgrave_cache')))
+            self.backend = FileBackend(directory, int(app.config.get('CACHE_MAX_ENTRIES', os.environ.get('CACHE_MAX_ENTRIES', 2048))))
+        else:
+            self.backend = MemoryBackend(int(app.config.get('CACHE_MAX_ENTRIES', os.environ.get('CACHE_MAX_ENTRIES', 512))))
+        self.default_ttl = int(app.config.get('CACHE_DEFAULT_TTL', os.environ.get('CACHE_DEFAULT_TTL', DEFAULT_TTL)))
+
+        if not self._listening:
+            # db.session is shared by every app the factory builds - hook it once
+            event.listen(db.session, 'after_flush', self._track_writes)
+            event.listen(db.session, 'after_commit', self._purge_written)
+            event.listen(db.session, 'after_rollback', self._forget_writes)
+            self._listening = True
+
+    # Session hooks: collect the model names touched in each flush and purge
+    # them only once the transaction has actually committed.
+    def _track_writes(self, session, flush_context):
+        written = session.info.setdefault('cache_tags', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            written.add(type(obj).__name__)
+
+    def _purge_written(self, session):
+        tags = session.info.pop('cache_tags', None)
+        if tags:
+            self.invalidate(*tags)
+
+    def _forget_writes(self, session):
+        session.info.pop('cache_tags', None)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, tags=(), ttl=None, snapshot=None):
+        self.backend.set(key, value, tags, ttl or self.default_ttl, snapshot)
+
+    def invalidate(self, *tags):
+        self.backend.invalidate(tags)
+        for listener in self._invalidation_listeners:
+            listener(set(tags))
+
+    def on_invalidate(self, listener):
+        """Call listener(tags) after every invalidation (e.g. to republish static files)"""
+        if listener not in self._invalidation_listeners:
+            self._invalidation_listeners.append(listener)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, builder, tags=(), ttl=None):
+        value = self.get(key)
+        if value is None:
+            snapshot = self.backend.snapshot(tags)
+            value = builder()
+            self.set(key, value, tags, ttl, snapshot)
+        return value
+
+    def cached(self, *tags, ttl=None):
+        """Cache successful GET responses of a view, keyed by path and query string"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = 'view:' + request.full_path
+                entry = self.get(key)
+                if entry is not None:
+                    body, status, headers = entry
+                    response = make_response(body, status)
+                    response.headers.clear()
+                    response.headers.extend(headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response.make_conditional(request)
+
+                snapshot = self.backend.snapshot(tags)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'set-cookie']
+                    self.set(key, (response.get_data(), 200, headers), tags, ttl, snapshot)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
@@ -1,8 +1,11 @@
-from app import app, db, User, Page, NewsItem, Event, Document
-from flask import render_template_string, redirect, url_for, request, flash, jsonify, send_from_directory
+from app import app, db, cache, User, Page, NewsItem, Event, Document
+from flask import render_template, redirect, url_for, request, flash, jsonify, send_from_directory
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
 import os
+from pagination import keyset_response, parse_limit
+from search import search, fts5_available, SOURCES as SEARCH_SOURCES
+from conditional import conditional
 
 # Login route
 @app.route('/login', methods=['GET', 'POST'])
@@ -16,20 +19,7 @@ def login():
             return redirect(url_for('admin_dashboard'))
         flash('Invalid credentials')
     
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>CMS Login</title></head>
-    <body>
-        <h2>CMS Login</h2>
-        <form method="post">
-            <p>Username: <input type="text" name="username" required></p>
-            <p>Password: <input type="password" name="password" required></p>
-            <p><input type="submit" value="Login"></p>
-        </form>
-    </body>
-    </html>
-    ''')
+    return render_template('simple/login.html')
 
 @app.route('/logout')
 @login_required
@@ -41,35 +31,18 @@ def logout():
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>CMS Dashboard</title></head>
-    <body>
-        <h1>CMS Dashboard</h1>
-        <nav>
-            <a href="{{ url_for('manage_pages') }}">Manage Pages</a> |
-            <a href="{{ url_for('manage_news') }}">Manage News</a> |
-            <a href="{{ url_for('manage_events') }}">Manage Events</a> |
-            <a href="{{ url_for('logout') }}">Logout</a>
-        </nav>
-    </body>
-    </html>
-    ''')
+    return render_template('simple/dashboard.html')
 
 # API Routes for frontend
 @app.route('/api/pages')
+@cache.cached('Page')
+@conditional(Page)
 def api_pages():
-    pages = Page.query.all()
-    return jsonify([{
-        'id': p.id,
-        'title': p.title,
-        'content': p.content,
-        'slug': p.slug,
-        'updated_at': p.updated_at.isoformat() if p.updated_at else None
-    } for p in pages])
+    return keyset_response(Page, ['id', 'title', 'content', 'slug', 'updated_at'], ['id'])
 
 @app.route('/api/pages/<slug>')
+@cache.cached('Page')
+@conditional(Page)
 def api_page(slug):
     page = Page.query.filter_by(slug=slug).first()
     if page:
@@ -83,54 +56,40 @@ def api_page(slug):
     return jsonify({'error': 'Page not found'}), 404
 
 @app.route('/api/news')
+@cache.cached('NewsItem')
+@conditional(NewsItem)
 def api_news():
-    news = NewsItem.query.order_by(NewsItem.date.desc()).all()
-    return jsonify([{
-        'id': n.id,
-        'title': n.title,
-        'content': n.content,
-        'date': n.date.isoformat() if n.date else None
-    } for n in news])
+    return keyset_response(NewsItem, ['id', 'title', 'content', 'date'], ['date', 'id'], descending=True)
 
 @app.route('/api/events')
+@cache.cached('Event')
+@conditional(Event)
 def api_events():
-    events = Event.query.order_by(Event.date.asc()).all()
-    return jsonify([{
-        'id': e.id,
-        'title': e.title,
-        'description': e.description,
-        'date': e.date.isoformat() if e.date else None,
-        'location': e.location
-    } for e in events])
+    return keyset_response(Event, ['id', 'title', 'description', 'date', 'location'], ['date', 'id'])
+
+@app.route('/api/search')
+@cache.cached('Page', 'NewsItem', 'Event', 'Document')
+@conditional(Page, NewsItem, Event, Document)
+def api_search():
+    """Full-text search: ?q=allotments&type=page,news&limit=20"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    if not fts5_available(db):
+        return jsonify({'error': 'Search is not available'}), 503
+    kinds = [k for k in request.args.get('type', '').split(',') if k in SEARCH_SOURCES] or None
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(search(db, q, kinds, limit))
 
 # Page management
 @app.route('/admin/pages')
 @login_required
 def manage_pages():
     pages = Page.query.all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage Pages</title></head>
-    <body>
-        <h1>Manage Pages</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add New Page</h2>
-        <form method="post" action="{{ url_for('add_page') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Slug: <input type="text" name="slug" required></p>
-            <p>Content: <textarea name="content" rows="10" cols="50" required></textarea></p>
-            <p><input type="submit" value="Add Page"></p>
-        </form>
-        <h2>Existing Pages</h2>
-        <ul>
-        {% for page in pages %}
-            <li>{{ page.title }} ({{ page.slug }}) - <a href="{{ url_for('edit_page', id=page.id) }}">Edit</a></li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', pages=pages)
+    return render_template('simple/pages.html', pages=pages)
 
 @app.route('/admin/pages/add', methods=['POST'])
 @login_required
@@ -150,28 +109,7 @@ def add_page():
 @login_required
 def manage_news():
     news = NewsItem.query.order_by(NewsItem.date.desc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage News</title></head>
-    <body>
-        <h1>Manage News</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add News Item</h2>
-        <form method="post" action="{{ url_for('add_news') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Content: <textarea name="content" rows="10" cols="50" required></textarea></p>
-            <p><input type="submit" value="Add News"></p>
-        </form>
-        <h2>Existing News</h2>
-        <ul>
-        {% for item in news %}
-            <li>{{ item.title }} - {{ item.date.strftime('%Y-%m-%d') }}</li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', news=news)
+    return render_template('simple/news.html', news=news)
 
 @app.route('/admin/news/add', methods=['POST'])
 @login_required
@@ -190,30 +128,7 @@ def add_news():
 @login_required
 def manage_events():
     events = Event.query.order_by(Event.date.asc()).all()
-    return render_template_string('''
-    <!DOCTYPE html>
-    <html>
-    <head><title>Manage Events</title></head>
-    <body>
-        <h1>Manage Events</h1>
-        <a href="{{ url_for('admin_dashboard') }}">Back to Dashboard</a>
-        <h2>Add Event</h2>
-        <form method="post" action="{{ url_for('add_event') }}">
-            <p>Title: <input type="text" name="title" required></p>
-            <p>Description: <textarea name="description" rows="5" cols="50" required></textarea></p>
-            <p>Date: <input type="datetime-local" name="date" required></p>
-            <p>Location: <input type="text" name="location"></p>
-            <p><input type="submit" value="Add Event"></p>
-        </form>
-        <h2>Upcoming Events</h2>
-        <ul>
-        {% for event in events %}
-            <li>{{ event.title }} - {{ event.date.strftime('%Y-%m-%d %H:%M') }} at {{ event.location or 'TBD' }}</li>
-        {% endfor %}
-        </ul>
-    </body>
-    </html>
-    ''', events=events)
+    return render_template('simple/events.html', events=events)
 
 @app.route('/admin/events/add', methods=['POST'])
 @login_required
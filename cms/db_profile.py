@@ -0,0 +1,114 @@
+"""
+SQLite tuning profile for the CMS database
+
+Call configure_database(app) after setting SQLALCHEMY_DATABASE_URI and before
+creating SQLAlchemy(app). It fills in SQLALCHEMY_ENGINE_OPTIONS (pool sizing,
+busy timeout) and registers a connect hook that applies the PRAGMAs below to
+every new SQLite connection.
+
+With the default rollback journal a writer locks the whole file while it
+commits, so every public reader waits on admin saves. WAL lets readers keep
+reading the last committed snapshot while a write is in progress.
+
+Every setting can be overridden with an environment variable of the same
+name, e.g. SQLITE_SYNCHRONOUS=FULL or DB_POOL_SIZE=10. Set DB_PROFILE=default
+to turn the tuning off (used by bench/sqlite_profile.py for comparison).
+"""
+
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+TUNED_PRAGMAS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',       # safe with WAL, fsyncs only at checkpoints
+    'SQLITE_BUSY_TIMEOUT': '5000',        # ms to wait for a lock instead of failing
+    'SQLITE_CACHE_SIZE': '-20000',        # negative = KiB, i.e. ~20 MB page cache
+    'SQLITE_MMAP_SIZE': '268435456',      # 256 MB memory-mapped reads
+    'SQLITE_TEMP_STORE': 'MEMORY',
+}
+
+PRAGMA_NAMES = {
+    'SQLITE_JOURNAL_MODE': 'journal_mode',
+    'SQLITE_SYNCHRONOUS': 'synchronous',
+    'SQLITE_BUSY_TIMEOUT': 'busy_timeout',
+    'SQLITE_CACHE_SIZE': 'cache_size',
+    'SQLITE_MMAP_SIZE': 'mmap_size',
+    'SQLITE_TEMP_STORE': 'temp_store',
+}
+
+_listener_installed = False
+
+
+def sqlite_pragmas(profile=None):
+    """Return [(pragma, value), ...] for the given profile ('tuned' or 'default')"""
+    profile = profile or os.environ.get('DB_PROFILE', 'tuned')
+    if profile == 'default':
+        return []
+    return [(PRAGMA_NAMES[key], os.environ.get(key, value)) for key, value in TUNED_PRAGMAS.items()]
+
+
+def engine_options(uri, profile=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri` - explicit pool sizing per worker"""
+    profile = profile or os.environ.get('DB_PROFILE', 'tuned')
+    options = {}
+    if not uri.startswith('sqlite'):
+        # A local SQLite file can't drop the connection, so only ping servers
+        options.update({
+            'pool_pre_ping': True,
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        })
+        return options
+
+    if uri in ('sqlite://', 'sqlite:///:memory:') or profile == 'default':
+        return options
+
+    # One pool per gunicorn worker; a handful of connections covers its threads
+    options.update({
+        'poolclass': QueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'connect_args': {
+            'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', TUNED_PRAGMAS['SQLITE_BUSY_TIMEOUT'])) / 1000,
+            'check_same_thread': False,
+        },
+    })
+    return options
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas:
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def install_pragma_listener(profile=None):
+    global _listener_installed
+    if _listener_installed:
+        return
+    pragmas = sqlite_pragmas(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(Engine, 'connect')
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        # Only touch SQLite connections; other backends ignore the profile
+        if type(dbapi_connection).__module__.split('.')[0] not in ('sqlite3', 'pysqlite2'):
+            return
+        apply_pragmas(dbapi_connection, pragmas)
+
+    _listener_installed = True
+
+
+def configure_database(app, profile=None):
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = engine_options(uri, profile)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    install_pragma_listener(profile)
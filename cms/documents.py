@@ -0,0 +1,172 @@
+"""
+Content-addressed document storage (agendas, minutes, ...)
+
+    documents = DocumentStore(app)
+    digest, size = documents.save(stream, add_row)   # streamed, SHA-256 while writing
+    documents.delete(digest, in_use)                 # only if no row still uses it
+    return documents.send(digest, filename)          # Range / ETag / immutable caching
+
+Uploads are copied to a temporary file in CHUNK_SIZE pieces while being
+hashed, so memory use doesn't grow with the file, and then moved to
+
+    DOCUMENT_DIR/objects/ab/abcdef...    (the SHA-256 of the content)
+
+If that object already exists - the same minutes PDF uploaded twice - the
+temporary file is simply dropped, so each distinct file is stored once. A
+Document row stores the digest; several rows may share one object, which is
+only deleted with the last row referencing it. Placing an object and
+committing its row (save's `stored` callback), and checking for remaining
+rows and unlinking (delete's `in_use`), run under one store-wide lock, so
+an upload of the same file can't land between a delete's check and unlink.
+
+Since the URL /documents/<sha256>/<filename> can never point at different
+bytes, responses are cached for a year as immutable. send_file answers
+If-None-Match (ETag = digest) with 304 and Range with 206, and hands the open
+file to the server's wsgi.file_wrapper (sendfile under gunicorn) instead of
+reading it into the worker. Set USE_X_SENDFILE=True behind a web server that
+supports X-Sendfile to take the transfer off the worker entirely.
+
+DOCUMENT_DIR defaults to <instance path>/documents and DOCUMENT_MAX_BYTES
+(default 50 MB) caps an upload. Unless MAX_CONTENT_LENGTH is configured it
+is set to that limit (plus room for the multipart envelope), so Werkzeug
+answers an oversized request with 413 before reading or spooling its body.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows - per-process lock only, fine for local development
+    fcntl = None
+
+from flask import abort, send_file
+
+CHUNK_SIZE = 64 * 1024
+MAX_BYTES = 50 * 1024 * 1024
+MAX_AGE = 365 * 24 * 3600
+MULTIPART_OVERHEAD = 64 * 1024
+
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class DocumentError(Exception):
+    """An upload that can't be stored (empty or too large)"""
+
+
+class DocumentStore:
+    def __init__(self, app=None):
+        self.directory = None
+        self.max_bytes = MAX_BYTES
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config.get('DOCUMENT_DIR', os.environ.get(
+            'DOCUMENT_DIR', os.path.join(app.instance_path, 'documents')))
+        self.max_bytes = int(app.config.get('DOCUMENT_MAX_BYTES', os.environ.get('DOCUMENT_MAX_BYTES', MAX_BYTES)))
+        if app.config.get('MAX_CONTENT_LENGTH') is None:
+            app.config['MAX_CONTENT_LENGTH'] = self.max_bytes + MULTIPART_OVERHEAD
+
+    def path(self, digest):
+        if not DIGEST.match(digest or ''):
+            raise ValueError('Invalid document digest')
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    @contextmanager
+    def locked(self):
+        """Exclusive across threads and worker processes"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self, stream, stored=None):
+        """
+        Store everything readable from `stream`; returns (sha256 hex, size).
+        stored(digest, size) - e.g. committing the Document row - runs while
+        the object is guaranteed to exist, before any delete can look at it.
+        """
+        temp_dir = os.path.join(self.directory, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise DocumentError(f'Document is larger than {self.max_bytes} bytes')
+                    digest.update(chunk)
+                    f.write(chunk)
+            if not size:
+                raise DocumentError('Document is empty')
+
+            path = self.path(digest.hexdigest())
+            with self.locked():
+                if os.path.exists(path):
+                    os.unlink(temp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.chmod(temp_path, 0o644)
+                    os.replace(temp_path, path)
+                if stored is not None:
+                    stored(digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return digest.hexdigest(), size
+
+    def delete(self, digest, in_use=None):
+        """Remove an object, unless in_use(digest) says a row still references it"""
+        with self.locked():
+            if in_use is not None and in_use(digest):
+                return False
+            try:
+                os.unlink(self.path(digest))
+            except FileNotFoundError:
+                pass
+        return True
+
+    def send(self, digest, filename, content_type=None):
+        """Immutable, range-capable response for a stored object"""
+        try:
+            path = self.path(digest)
+        except ValueError:
+            abort(404)
+        if not os.path.exists(path):
+            abort(404)
+        mimetype = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(path, mimetype=mimetype, download_name=filename, conditional=True,
+                             etag=digest, max_age=MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.accept_ranges = 'bytes'
+        return response
+
+
+def safe_filename(name):
+    """Keep the uploaded name readable but usable in a URL and a header"""
+    name = os.path.basename((name or '').replace('\\', '/'))
+    name = re.sub(r'[^A-Za-z0-9._-]+', '-', name).strip('.-')
+    return name[:200] or 'document'
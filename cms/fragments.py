@@ -0,0 +1,90 @@
+"""
+Per-row cache of serialized JSON bytes
+
+Public content almost never changes, yet every collection request turns the
+same rows into dicts (with .isoformat() calls) and encodes them again. Here
+each row's encoded JSON object is kept under (model, id, version, variant),
+where version is the row's updated_at (see conditional.version_column) and
+variant names the projection (e.g. the ?fields list). A collection response
+is then just the cached fragments joined with commas:
+
+    body = json_list(Event, events, event_to_dict)
+    return json_response(body)
+
+An edited row gets a new updated_at and therefore a new key; the old entry
+simply ages out of the LRU. Models without updated_at (created_at only) are
+dropped from the cache whenever their cache tag is invalidated, since a bulk
+update wouldn't change their key.
+
+orjson is used for encoding when it is installed, the stdlib json otherwise.
+"""
+
+import json
+import os
+
+from flask import Response
+
+from cache import MemoryBackend
+from conditional import version_column
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_ENTRIES = int(os.environ.get('ROW_CACHE_MAX_ENTRIES', 20000))
+
+
+def _default(value):
+    return str(value)
+
+
+if orjson is not None:
+    def dumps(value):
+        """Compact JSON as bytes"""
+        return orjson.dumps(value, default=_default)
+else:
+    def dumps(value):
+        """Compact JSON as bytes"""
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=_default).encode()
+
+
+class FragmentCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.backend = MemoryBackend(max_entries)
+        self._unversioned = set()
+
+    def fragment(self, model, row, serialize, variant=''):
+        """Encoded JSON for one row; `row` needs id and the model's version column"""
+        column = version_column(model)
+        if column.name != 'updated_at':
+            self._unversioned.add(model.__name__)
+        key = (model.__name__, row.id, getattr(row, column.name), variant)
+        body = self.backend.get(key)
+        if body is None:
+            body = dumps(serialize(row))
+            self.backend.set(key, body, tags=(model.__name__,))
+        return body
+
+    def json_list(self, model, rows, serialize, variant=''):
+        return b'[' + b','.join(self.fragment(model, row, serialize, variant) for row in rows) + b']'
+
+    def invalidate(self, tags):
+        """Cache.on_invalidate listener"""
+        stale = set(tags) & self._unversioned
+        if stale:
+            self.backend.invalidate(stale)
+
+    def clear(self):
+        self.backend.clear()
+
+
+fragments = FragmentCache()
+
+
+def json_list(model, rows, serialize, variant=''):
+    return fragments.json_list(model, rows, serialize, variant)
+
+
+def json_response(body, status=200):
+    return Response(body, status=status, mimetype='application/json')
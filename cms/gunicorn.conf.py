@@ -0,0 +1,96 @@
+"""
+Gunicorn production profile for Kesgrave CMS
+
+    gunicorn -c gunicorn.conf.py main:app
+
+GUNICORN_PROFILE picks the worker class:
+
+    gthread (default)  a few processes with a thread pool each - the
+                       SQLite pool is shared by the threads of a worker
+    sync               one request per process, 2 * CPU + 1 processes
+    gevent             cooperative workers for many slow clients; needs the
+                       gevent package and falls back to gthread without it
+
+The app is preloaded in the master so workers share its memory copy-on-write,
+and the one-off schema setup (migrations.prepare_database) runs there once
+before any worker is forked. Every setting can be overridden by environment
+variable (WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_TIMEOUT, ...).
+
+With more than one worker the response cache must be shared: a commit only
+invalidates the cache of the worker that made it, so a per-process memory
+cache would serve stale content from every other worker. CACHE_BACKEND
+defaults to 'file' here (see cache.py), and 'memory' is refused unless
+WEB_CONCURRENCY=1.
+"""
+
+import multiprocessing
+import os
+
+PROFILES = ('sync', 'gthread', 'gevent')
+
+cpus = multiprocessing.cpu_count()
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile not in PROFILES:
+    raise ValueError(f"GUNICORN_PROFILE must be one of {', '.join(PROFILES)}, not {profile!r}")
+
+if profile == 'gevent':
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        print("⚠️ gevent is not installed - using the gthread profile instead")
+        profile = 'gthread'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = profile
+
+if profile == 'sync':
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+elif profile == 'gthread':
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+else:
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus))
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+
+if workers > 1:
+    if os.environ.get('CACHE_BACKEND', 'file') == 'memory':
+        raise ValueError("CACHE_BACKEND=memory can't be invalidated across workers - "
+                         "use CACHE_BACKEND=file or WEB_CONCURRENCY=1")
+    # Read by the app when it is loaded below (preload) or in each worker
+    os.environ.setdefault('CACHE_BACKEND', 'file')
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+# Keep connections from the load balancer open between requests (ignored by sync workers)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then so slow leaks can't build up; the jitter stops
+# them all restarting at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Schema setup once, in the master, before any worker exists"""
+    from main import app, db, setup_database
+    from migrations import prepare_database
+
+    prepare_database(app, db, setup_database)
+    with app.app_context():
+        # Don't hand the master's SQLite connections down to the workers
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    from main import app, db
+
+    with app.app_context():
+        # Each worker opens its own pool; leave any inherited connections alone
+        db.engine.dispose(close=False)
@@ -0,0 +1,158 @@
+"""
+Minimal iCalendar (RFC 5545) reading and writing for events and meetings
+
+Only what the CMS needs: VEVENTs with SUMMARY, DESCRIPTION, DTSTART,
+LOCATION and CATEGORIES. Dates are stored naive (local time) in the
+database, so they are written as floating times.
+
+    rows = parse_ics(text)                  # [{'title': ..., 'date': datetime, ...}]
+    for chunk in iter_calendar(items, row_vevent, 'Kesgrave Events'): ...
+    return calendar_response(events, 'Kesgrave Events')     # subscription feed
+"""
+
+from datetime import datetime
+
+from flask import Response
+
+PRODID = '-//Kesgrave Town Council//Kesgrave CMS//EN'
+
+# How often subscribed calendar apps are asked to poll (RFC 7986 / Outlook)
+REFRESH_INTERVAL = 'PT1H'
+
+FIELDS = {
+    'SUMMARY': 'title',
+    'DESCRIPTION': 'description',
+    'LOCATION': 'location',
+    'CATEGORIES': 'category',
+}
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def unescape(value):
+    out = []
+    chars = iter(value)
+    for c in chars:
+        if c == '\\':
+            nxt = next(chars, '')
+            out.append('\n' if nxt in ('n', 'N') else nxt)
+        else:
+            out.append(c)
+    return ''.join(out)
+
+
+def fold(line):
+    """Split a content line into 75-octet pieces (continuations start with a space)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    pieces = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        pieces.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def format_datetime(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def parse_datetime(value, params=''):
+    value = value.strip()
+    if 'VALUE=DATE' in params.upper() or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d')
+    # A trailing Z (UTC) or a TZID parameter is dropped - times are stored naive
+    return datetime.strptime(value.rstrip('Zz')[:15], '%Y%m%dT%H%M%S')
+
+
+def vevent(uid, stamp, start, title, description=None, location=None, category=None):
+    """Lines of one VEVENT"""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{stamp.strftime("%Y%m%dT%H%M%SZ")}',
+        f'DTSTART:{format_datetime(start)}',
+        f'SUMMARY:{escape(title)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape(description)}')
+    if location:
+        lines.append(f'LOCATION:{escape(location)}')
+    if category:
+        lines.append(f'CATEGORIES:{escape(category)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def row_vevent(obj):
+    """vevent() lines for an Event or Meeting row"""
+    return vevent(
+        uid=f'{obj.__tablename__}-{obj.id}@kesgrave-cms',
+        stamp=getattr(obj, 'updated_at', None) or obj.created_at or datetime.utcnow(),
+        start=obj.date,
+        title=obj.title,
+        description=obj.description,
+        location=obj.location,
+        category=getattr(obj, 'category', None),
+    )
+
+
+def iter_calendar(items, to_vevent=row_vevent, name=None, refresh=None):
+    """Yield a VCALENDAR as text chunks; to_vevent(item) returns vevent() lines"""
+    header = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN']
+    if name:
+        header.append(f'X-WR-CALNAME:{escape(name)}')
+    if refresh:
+        header += [f'REFRESH-INTERVAL;VALUE=DURATION:{refresh}', f'X-PUBLISHED-TTL:{refresh}']
+    yield ''.join(fold(line) for line in header)
+    for item in items:
+        yield ''.join(fold(line) for line in to_vevent(item))
+    yield fold('END:VCALENDAR')
+
+
+def calendar_response(items, name, to_vevent=row_vevent):
+    """
+    A whole feed as one (non-streamed) response, so cache.cached can keep the
+    rendered text and conditional() can answer polls with 304.
+    """
+    body = ''.join(iter_calendar(items, to_vevent, name, REFRESH_INTERVAL))
+    return Response(body, mimetype='text/calendar')
+
+
+def parse_ics(text):
+    """VEVENTs in `text` as dicts with title/description/location/category/date"""
+    # Unfold continuation lines first
+    lines = []
+    for raw in text.replace('\r\n', '\n').split('\n'):
+        if raw[:1] in (' ', '\t') and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+
+    rows = []
+    current = None
+    for line in lines:
+        name, _, value = line.partition(':')
+        name, _, params = name.partition(';')
+        name = name.upper()
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            current = {}
+        elif name == 'END' and value.upper() == 'VEVENT':
+            if current is not None:
+                rows.append(current)
+            current = None
+        elif current is not None:
+            if name == 'DTSTART':
+                current['date'] = parse_datetime(value, params)
+            elif name in FIELDS:
+                current[FIELDS[name]] = unescape(value)
+    return rows
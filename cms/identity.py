@@ -0,0 +1,98 @@
+"""
+Cached identity for Flask-Login
+
+Flask-Login calls the user_loader on every request that carries a session,
+so every admin page paid a SELECT on the user table before doing any work.
+
+    identities = IdentityCache(app, cache)
+
+    @login_manager.user_loader
+    @identities.user_loader
+    def load_user(user_id):
+        user = db.session.get(User, int(user_id))
+        return Identity(user.id, user.username) if user else None
+
+The loader's result - a small Identity, not the ORM row, so it can be shared
+between requests and threads - is kept for IDENTITY_CACHE_TTL seconds
+(default 300) in a bounded per-process LRU. Entries are keyed on the
+shared cache's 'User' tag version, so a committed User row in any worker
+(CACHE_BACKEND=file bumps a counter every worker reads) makes every worker
+load the identity afresh.
+
+With IDENTITY_IN_SESSION=1 the id and username are also carried in the
+signed session cookie at login, and the loader doesn't even look at the
+cache. The trade-off: deleting a user then only takes effect once their
+session ends.
+"""
+
+import os
+from functools import wraps
+
+from flask import session
+from flask_login import UserMixin
+
+from cache import MemoryBackend
+
+TAG = 'User'
+SESSION_KEY = '_identity'
+
+
+class Identity(UserMixin):
+    def __init__(self, id, username=None):
+        self.id = id
+        self.username = username
+
+    def get_id(self):
+        return str(self.id)
+
+
+class IdentityCache:
+    def __init__(self, app=None, cache=None):
+        self.backend = MemoryBackend(256)
+        self.cache = None
+        self.ttl = 300
+        self.in_session = False
+        if app is not None:
+            self.init_app(app, cache)
+
+    def init_app(self, app, cache):
+        self.backend = MemoryBackend(int(app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 256)))
+        self.ttl = int(app.config.get('IDENTITY_CACHE_TTL', os.environ.get('IDENTITY_CACHE_TTL', 300)))
+        in_session = app.config.get('IDENTITY_IN_SESSION', os.environ.get('IDENTITY_IN_SESSION', '0'))
+        self.in_session = str(in_session).lower() in ('1', 'true', 'yes', 'on')
+        self.cache = cache
+        cache.on_invalidate(self.invalidate)
+
+    def invalidate(self, tags):
+        """Cache.on_invalidate listener - frees this process's entries straight away"""
+        if TAG in tags:
+            self.backend.invalidate([TAG])
+
+    def user_loader(self, load):
+        """Wrap a Flask-Login user_loader with the session identity and the cache"""
+        @wraps(load)
+        def loader(user_id):
+            if self.in_session:
+                carried = session.get(SESSION_KEY)
+                if carried and str(carried.get('id')) == str(user_id):
+                    return Identity(carried['id'], carried.get('username'))
+
+            version = self.cache.backend.snapshot([TAG])[TAG] if self.cache is not None else 0
+            key = f'{user_id}:{version}'
+            identity = self.backend.get(key)
+            if identity is None:
+                snapshot = self.backend.snapshot([TAG])
+                identity = load(user_id)
+                if identity is not None:
+                    self.backend.set(key, identity, [TAG], self.ttl, snapshot)
+            return identity
+        return loader
+
+    def remember(self, user):
+        """Call after login_user()"""
+        if self.in_session:
+            session[SESSION_KEY] = {'id': user.id, 'username': user.username}
+
+    def forget(self):
+        """Call after logout_user()"""
+        session.pop(SESSION_KEY, None)
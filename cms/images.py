@@ -0,0 +1,382 @@
+"""
+Responsive derivatives of homepage slide images
+
+    images = ImagePipeline()
+    images.init_app(app, cache, Slide)
+
+Every visitor used to download each carousel image at full size. Whenever a
+Slide is committed (its cache tag is invalidated), a background thread
+fetches each slide image_url - http(s) or /static/... - that has no
+derivatives yet, and a pool of IMAGE_WORKERS threads (Pillow releases the
+GIL while resizing and encoding) writes resized, recompressed copies:
+
+    IMAGE_DIR/<sha256 of source>/480.avif, 480.webp, 480.jpg, 960.avif, ...
+                                /manifest.json
+
+Derivatives are keyed by the source's hash, so pointing two slides at the
+same picture costs one download and no resizing, and re-saving a slide whose
+image_url hasn't changed costs nothing. AVIF and
+WebP are produced when the installed Pillow supports them (AVIF needs
+Pillow 11.2+ or pillow-avif-plugin); JPEG (PNG for transparent images) is
+always there as the fallback. Once new derivatives exist the slides' updated_at
+is bumped, so the homepage cache, ETags and static publish all pick them up.
+
+slide_to_dict() adds them to the API via variants(url):
+
+    "image_srcset": "/images/<hash>/480.jpg 480w, /images/<hash>/960.jpg 960w",
+    "image_sources": [{"type": "image/avif", "srcset": "..."}, ...]
+
+The URLs are relative to the CMS unless IMAGE_BASE_URL is set (e.g.
+https://kesgrave-cms.onrender.com for a frontend on another host). Manifests
+are kept in memory by source hash, and which hash a URL maps to is re-read
+from disk at most every SOURCE_RECHECK seconds, so serializing slides -
+including on asgi.py's event loop - almost never touches the disk.
+
+Needs Pillow; without it (or with IMAGE_PIPELINE=0) slides are served
+exactly as before. 'flask build-images' re-fetches every source
+synchronously, picking up images replaced at the same URL.
+Given a JobQueue (jobs.py) the refresh runs as a deduplicated 'slide-images'
+job instead of on its own thread.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+
+from flask import abort, send_file
+from sqlalchemy import update
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF plugin on older Pillow
+except ImportError:
+    pass
+
+WIDTHS = (480, 960, 1440, 1920)
+QUALITY = 80
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+FETCH_TIMEOUT = 15
+MAX_AGE = 365 * 24 * 3600
+CHUNK_SIZE = 64 * 1024
+SOURCE_RECHECK = 60
+
+# (format, Pillow encoder, extension, mime type) in order of preference
+ENCODERS = (
+    ('avif', 'AVIF', 'avif', 'image/avif'),
+    ('webp', 'WEBP', 'webp', 'image/webp'),
+)
+FALLBACK = ('jpeg', 'JPEG', 'jpg', 'image/jpeg')
+FALLBACK_ALPHA = ('png', 'PNG', 'png', 'image/png')
+
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+NAME = re.compile(r'^\d+\.(avif|webp|jpg|png)$')
+
+
+def supported_encoders():
+    """The modern formats this Pillow build can write"""
+    if Image is None:
+        return ()
+    available = []
+    for encoder in ENCODERS:
+        try:
+            if features.check(encoder[0]):
+                available.append(encoder)
+        except ValueError:  # Pillow too old to know the feature
+            if encoder[1] in Image.SAVE:
+                available.append(encoder)
+    return tuple(available)
+
+
+class ImagePipeline:
+    def __init__(self, app=None, cache=None, model=None, jobs=None):
+        self.directory = None
+        self.base_url = ''
+        self.enabled = False
+        self.widths = WIDTHS
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pending = False
+        self._worker = None
+        self._pool = None
+        self._listening = False
+        self._manifests = {}  # source sha256 -> manifest
+        self._sources = {}  # url -> (source sha256 or None, when it was read)
+        self.jobs = None
+        if app is not None:
+            self.init_app(app, cache, model, jobs=jobs)
+
+    def init_app(self, app, cache, model, column='image_url', jobs=None):
+        self.app = app
+        self.cache = cache
+        self.model = model
+        self.column = column
+        self.configure(app.config, app.instance_path)
+        widths = app.config.get('IMAGE_WIDTHS', os.environ.get('IMAGE_WIDTHS'))
+        if widths:
+            self.widths = tuple(sorted(int(w) for w in str(widths).split(',') if w.strip()))
+        self.quality = int(app.config.get('IMAGE_QUALITY', os.environ.get('IMAGE_QUALITY', QUALITY)))
+        self.workers = int(app.config.get('IMAGE_WORKERS', os.environ.get('IMAGE_WORKERS', 2)))
+        self.max_source_bytes = int(app.config.get('IMAGE_MAX_SOURCE_BYTES', MAX_SOURCE_BYTES))
+        self.static_folder = app.static_folder
+        switch = str(app.config.get('IMAGE_PIPELINE', os.environ.get('IMAGE_PIPELINE', '1'))).lower()
+        self.enabled = Image is not None and switch not in ('0', 'false', 'no', 'off')
+        self.encoders = supported_encoders()
+        self.jobs = jobs
+        if jobs is not None:
+            jobs.task('slide-images')(self.refresh)
+
+        @app.cli.command('build-images')
+        def build_images_command():
+            """Build responsive derivatives for every slide image."""
+            if not self.enabled:
+                print("⚠️ Image pipeline disabled (Pillow not installed or IMAGE_PIPELINE=0)")
+                return
+            changed = self.refresh(force=True)
+            print(f"✅ Slide images up to date ({changed} slides with new derivatives)")
+
+        if self.enabled and not self._listening:
+            cache.on_invalidate(self.schedule)
+            self._listening = True
+
+    def configure(self, config, instance_path):
+        """
+        Where derivatives live and how they are linked - all variants() needs,
+        so asgi.py can serve the same payloads without init_app
+        """
+        self.directory = config.get('IMAGE_DIR', os.environ.get('IMAGE_DIR', os.path.join(instance_path, 'images')))
+        self.base_url = config.get('IMAGE_BASE_URL', os.environ.get('IMAGE_BASE_URL', '')).rstrip('/')
+
+    # Background refresh after Slide commits
+    def schedule(self, tags):
+        """Cache.on_invalidate listener; coalesces bursts of commits"""
+        if self.model.__name__ not in tags or getattr(self._local, 'quiet', False):
+            return
+        if self.jobs is not None:
+            self.jobs.try_enqueue('slide-images')
+            return
+        with self._lock:
+            self._pending = True
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._drain, name='image-pipeline', daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+                self._pending = False
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Slide image pipeline failed: {e}")
+
+    def wait(self):
+        worker = self._worker
+        if worker is not None:
+            worker.join()
+
+    def refresh(self, force=False):
+        """
+        Build derivatives for slide images that don't have them yet (every
+        image with force=True); returns how many slides changed
+        """
+        column = getattr(self.model, self.column)
+        with self.app.app_context():
+            rows = self.model.query.session.query(self.model.id, column).filter(column.isnot(None), column != '').all()
+
+        by_url = {}
+        for id, url in rows:
+            if force or not self._built(url):
+                by_url.setdefault(url, []).append(id)
+        if not by_url:
+            return 0
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='image')
+        results = dict(zip(by_url, self._pool.map(self._build_quietly, by_url)))
+        changed = [id for url, ids in by_url.items() if results[url] for id in ids]
+        if changed:
+            self._touch(changed)
+        return len(changed)
+
+    def _touch(self, ids):
+        """Bump updated_at so ETags, the homepage cache and static publish move on"""
+        with self.app.app_context():
+            session = self.model.query.session
+            session.execute(update(self.model).where(self.model.id.in_(ids)).values(updated_at=datetime.utcnow()))
+            session.commit()
+            self._local.quiet = True
+            try:
+                self.cache.invalidate(self.model.__name__)
+            finally:
+                self._local.quiet = False
+
+    # Building
+    def _build_quietly(self, url):
+        try:
+            return self.build(url)
+        except Exception as e:
+            print(f"⚠️ Could not build derivatives for {url}: {e}")
+            return False
+
+    def _source_index(self, url):
+        return os.path.join(self.directory, 'sources', hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def _read_source(self, url):
+        """sha256 of the source last built for `url`, or None"""
+        try:
+            with open(self._source_index(url)) as f:
+                return json.load(f)['sha256']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _built(self, url):
+        digest = self._read_source(url)
+        return digest is not None and os.path.exists(os.path.join(self.directory, digest, 'manifest.json'))
+
+    def _fetch(self, url, target):
+        """Copy the source image into `target` in chunks; returns its sha256"""
+        parsed = urlparse(url)
+        if parsed.scheme in ('http', 'https'):
+            source = urlopen(Request(url, headers={'User-Agent': 'kesgrave-cms-images'}), timeout=FETCH_TIMEOUT)
+        elif not parsed.scheme and parsed.path.startswith('/static/') and self.static_folder:
+            path = os.path.normpath(os.path.join(self.static_folder, parsed.path[len('/static/'):]))
+            if not path.startswith(os.path.normpath(self.static_folder) + os.sep):
+                raise ValueError('path outside the static folder')
+            source = open(path, 'rb')
+        else:
+            raise ValueError('unsupported image URL')
+
+        digest = hashlib.sha256()
+        size = 0
+        with source:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_source_bytes:
+                    raise ValueError(f'image is larger than {self.max_source_bytes} bytes')
+                digest.update(chunk)
+                target.write(chunk)
+        return digest.hexdigest()
+
+    def build(self, url):
+        """
+        Make sure derivatives exist for the current content of `url`.
+        Returns True if `url` now maps to different derivatives than before.
+        """
+        os.makedirs(os.path.join(self.directory, 'sources'), exist_ok=True)
+        with tempfile.TemporaryFile() as source:
+            digest = self._fetch(url, source)
+            output = os.path.join(self.directory, digest)
+            if not os.path.exists(os.path.join(output, 'manifest.json')):
+                source.seek(0)
+                self._resize(source, output, digest)
+
+        previous = self._read_source(url)
+        self._sources[url] = (digest, time.monotonic())
+        if previous == digest:
+            return False
+        self._write_json(self._source_index(url), {'url': url, 'sha256': digest})
+        return True
+
+    def _resize(self, source, output, digest):
+        with Image.open(source) as original:
+            original = ImageOps.exif_transpose(original)
+            alpha = original.mode in ('RGBA', 'LA') or (original.mode == 'P' and 'transparency' in original.info)
+            original = original.convert('RGBA' if alpha else 'RGB')
+            fallback = FALLBACK_ALPHA if alpha else FALLBACK
+            widths = [w for w in self.widths if w < original.width] or [original.width]
+            if original.width < self.widths[-1] and original.width not in widths:
+                widths.append(original.width)
+
+            temp_dir = tempfile.mkdtemp(dir=self.directory, prefix='.build-')
+            try:
+                manifest = {'sha256': digest, 'width': original.width, 'height': original.height, 'formats': []}
+                sized = {w: original if w == original.width else
+                         original.resize((w, round(original.height * w / original.width)), Image.LANCZOS)
+                         for w in widths}
+                for name, encoder, extension, mimetype in self.encoders + (fallback,):
+                    variants = []
+                    for width, resized in sized.items():
+                        filename = f'{width}.{extension}'
+                        options = {'quality': self.quality}
+                        if encoder == 'JPEG':
+                            options.update(optimize=True, progressive=True)
+                        elif encoder == 'PNG':
+                            options = {'optimize': True}
+                        resized.save(os.path.join(temp_dir, filename), encoder, **options)
+                        variants.append({'width': width, 'file': filename})
+                    manifest['formats'].append({'format': name, 'type': mimetype, 'variants': variants})
+                self._write_json(os.path.join(temp_dir, 'manifest.json'), manifest)
+                try:
+                    os.rename(temp_dir, output)
+                except OSError:  # another worker built the same source first
+                    pass
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _write_json(self, path, value):
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp, 'w') as f:
+            json.dump(value, f)
+        os.replace(temp, path)
+
+    # Serving
+    def manifest(self, url):
+        """Derivative manifest for `url`, or None if none has been built"""
+        if not self.directory or not url:
+            return None
+        digest, read_at = self._sources.get(url, (None, None))
+        if read_at is None or time.monotonic() - read_at > SOURCE_RECHECK:
+            digest = self._read_source(url)
+            self._sources[url] = (digest, time.monotonic())
+        if digest is None:
+            return None
+        if digest not in self._manifests:
+            try:
+                with open(os.path.join(self.directory, digest, 'manifest.json')) as f:
+                    self._manifests[digest] = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self._manifests[digest]
+
+    def variants(self, url):
+        """{'image_srcset': ..., 'image_sources': [...]} for the API; empty values if not built"""
+        manifest = self.manifest(url)
+        if manifest is None:
+            return {'image_srcset': None, 'image_sources': []}
+        base = f"{self.base_url}/images/{manifest['sha256']}/"
+        sources = [{
+            'type': f['type'],
+            'srcset': ', '.join(f"{base}{v['file']} {v['width']}w" for v in f['variants']),
+        } for f in manifest['formats']]
+        return {'image_srcset': sources[-1]['srcset'], 'image_sources': sources}
+
+    def send(self, digest, name):
+        """Immutable response for one derivative file"""
+        if not self.directory or not DIGEST.match(digest) or not NAME.match(name):
+            abort(404)
+        path = os.path.join(self.directory, digest, name)
+        if not os.path.exists(path):
+            abort(404)
+        response = send_file(path, conditional=True, etag=f'{digest}-{name}', max_age=MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,197 @@
+"""
+Per-request timing and SQL instrumentation (opt-in)
+
+    instrumentation = Instrumentation()
+    instrumentation.init_app(app, db)
+
+Does nothing unless INSTRUMENTATION=1 (config or env var). When enabled,
+every request records:
+
+  - wall time
+  - number of SQL statements and total time spent in them (SQLAlchemy
+    before/after_cursor_execute)
+  - response size
+
+and reports them in a Server-Timing header (visible in the browser's network
+panel) and as per-route histograms on /metrics in Prometheus text format.
+A request that runs more than SQL_QUERY_WARN_THRESHOLD statements (default
+10) is logged as an N+1 suspect, together with its most repeated statement.
+
+Metrics are kept per process: with several gunicorn workers each one
+reports its own share of the traffic.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time per request', DURATION_BUCKETS),
+    'http_request_sql_queries': ('SQL statements per request', QUERY_BUCKETS),
+    'http_request_sql_duration_seconds': ('Time spent in SQL per request', DURATION_BUCKETS),
+    'http_response_size_bytes': ('Response body size', SIZE_BUCKETS),
+}
+
+_listener_installed = False
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Metrics:
+    """Per-route histograms and counters, rendered as Prometheus text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}    # (metric, method, route) -> Histogram
+        self.requests = Counter()   # (method, route, status) -> count
+        self.suspects = Counter()   # route -> N+1 suspect requests
+
+    def observe(self, method, route, status, duration, queries, sql_duration, size):
+        values = {
+            'http_request_duration_seconds': duration,
+            'http_request_sql_queries': queries,
+            'http_request_sql_duration_seconds': sql_duration,
+            'http_response_size_bytes': size,
+        }
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            for metric, value in values.items():
+                if value is None:
+                    continue
+                key = (metric, method, route)
+                if key not in self.histograms:
+                    self.histograms[key] = Histogram(HISTOGRAMS[metric][1])
+                self.histograms[key].observe(value)
+
+    def suspect(self, route):
+        with self._lock:
+            self.suspects[route] += 1
+
+    def render(self):
+        lines = ['# HELP http_requests_total Requests handled', '# TYPE http_requests_total counter']
+        with self._lock:
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+            for metric, (description, buckets) in HISTOGRAMS.items():
+                lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+                for (name, method, route), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    labels = f'method="{method}",route="{route}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{{labels}}} {round(histogram.sum, 6)}')
+                    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+            lines += ['# HELP http_n_plus_one_suspects_total Requests over the SQL query threshold',
+                      '# TYPE http_n_plus_one_suspects_total counter']
+            for route, count in sorted(self.suspects.items()):
+                lines.append(f'http_n_plus_one_suspects_total{{route="{route}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    stats = g.get('_sql_stats')
+    started = getattr(context, '_instrumentation_started', None)
+    if stats is None or started is None:
+        return
+    stats['queries'] += 1
+    stats['seconds'] += time.perf_counter() - started
+    stats['statements'][statement] += 1
+
+
+def install_sql_listener():
+    global _listener_installed
+    if _listener_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _listener_installed = True
+
+
+class Instrumentation:
+    def __init__(self, app=None, db=None):
+        self.metrics = Metrics()
+        self.enabled = False
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db=None):
+        enabled = app.config.get('INSTRUMENTATION', os.environ.get('INSTRUMENTATION', '0'))
+        if str(enabled).lower() not in ('1', 'true', 'yes', 'on'):
+            return
+        self.enabled = True
+        self.threshold = int(app.config.get('SQL_QUERY_WARN_THRESHOLD',
+                                            os.environ.get('SQL_QUERY_WARN_THRESHOLD', 10)))
+
+        install_sql_listener()
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def _start(self):
+        g._request_started = time.perf_counter()
+        g._sql_stats = {'queries': 0, 'seconds': 0.0, 'statements': Counter()}
+
+    def _finish(self, response):
+        started = g.pop('_request_started', None)
+        stats = g.pop('_sql_stats', None)
+        if started is None or request.endpoint in ('metrics', 'static'):
+            return response
+
+        duration = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        # Streamed bodies aren't known yet - they only count towards the other metrics
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        response.headers.add('Server-Timing', f'app;dur={duration * 1000:.2f}')
+        response.headers.add('Server-Timing', f'db;dur={stats["seconds"] * 1000:.2f};desc="{stats["queries"]} queries"')
+
+        self.metrics.observe(request.method, route, response.status_code, duration,
+                             stats['queries'], stats['seconds'], size)
+
+        if stats['queries'] > self.threshold:
+            self.metrics.suspect(route)
+            statement, repeats = stats['statements'].most_common(1)[0]
+            current_app.logger.warning(
+                f"⚠️ N+1 suspect: {request.method} {route} ran {stats['queries']} queries "
+                f"({repeats}x: {' '.join(statement.split())[:200]})"
+            )
+        return response
+
+    def metrics_view(self):
+        return Response(self.metrics.render(), mimetype='text/plain; version=0.0.4')
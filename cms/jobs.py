@@ -0,0 +1,343 @@
+"""
+Local background job queue backed by the app's own database
+
+    jobs = JobQueue(app, db)
+
+    @jobs.task('publish')
+    def publish_job(tags):
+        ...
+
+    jobs.enqueue('publish', tags=['Event'])        # returns in milliseconds
+
+Work that follows a commit - static publishing, image derivatives, search
+index maintenance - is recorded as a row in the job_queue table and run by a
+pool of JOB_WORKERS consumer threads (default 2) in each process, so admin
+saves never wait for it and nothing is lost if a worker restarts.
+
+  - Deduplication: an identical job (same name and arguments) that is still
+    pending is not queued twice, so a burst of saves becomes one publish.
+    SQLite and PostgreSQL enforce this with a partial unique index and
+    INSERT ... ON CONFLICT DO NOTHING; other databases check before inserting.
+  - Retries: a job that raises is retried up to JOB_MAX_ATTEMPTS times
+    (default 3) with exponential backoff from JOB_RETRY_SECONDS (default 5),
+    then marked failed with its error.
+  - Several processes may consume the same table: a job is claimed with a
+    conditional UPDATE, and jobs left 'running' by a killed worker for more
+    than JOB_TIMEOUT seconds (default 600) are put back.
+  - Finished jobs are kept JOB_KEEP_DAYS (default 7) for the dashboard.
+
+Set JOB_WORKERS=0 to keep web processes free of consumers and run them
+separately with 'flask run-jobs'. With no broker to poll, idle consumers
+check the table every JOB_POLL_SECONDS (default 2) and are woken straight
+away by jobs enqueued in the same process.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, Text, delete, exists, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+STATUSES = (PENDING, RUNNING, DONE, FAILED)
+
+MAX_ERROR_LENGTH = 2000
+# Dialects with partial indexes and ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+PRUNE_EVERY = timedelta(hours=1)
+
+
+def job_table(metadata):
+    """The job_queue table, declared once on the app's metadata"""
+    if 'job_queue' in metadata.tables:
+        return metadata.tables['job_queue']
+    return Table(
+        'job_queue', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(100), nullable=False),
+        Column('payload', Text, nullable=False),
+        Column('dedupe_key', String(64), nullable=False),
+        Column('status', String(20), nullable=False, default=PENDING),
+        Column('attempts', Integer, nullable=False, default=0),
+        Column('max_attempts', Integer, nullable=False, default=3),
+        Column('run_at', DateTime, nullable=False),
+        Column('created_at', DateTime, nullable=False),
+        Column('started_at', DateTime),
+        Column('finished_at', DateTime),
+        Column('last_error', Text),
+        # Consumers: WHERE status = 'pending' AND run_at <= now ORDER BY run_at
+        Index('ix_job_queue_status_run_at', 'status', 'run_at'),
+        # At most one pending copy of each job
+        Index('ix_job_queue_pending_key', 'dedupe_key', unique=True,
+              sqlite_where=text("status = 'pending'"), postgresql_where=text("status = 'pending'"))
+        .ddl_if(dialect=tuple(UPSERT_INSERTS)),
+    )
+
+
+def dedupe_key(name, kwargs):
+    return hashlib.sha256(f'{name}:{json.dumps(kwargs, sort_keys=True)}'.encode()).hexdigest()
+
+
+class JobQueue:
+    def __init__(self, app=None, db=None):
+        self.app = None
+        self.table = None
+        self.tasks = {}
+        self.workers = 2
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._pruned_at = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        def setting(name, default):
+            return app.config.get(name, os.environ.get(name, default))
+
+        self.app = app
+        self.db = db
+        self.table = job_table(db.metadata)
+        self.workers = int(setting('JOB_WORKERS', 2))
+        self.max_attempts = int(setting('JOB_MAX_ATTEMPTS', 3))
+        self.retry_seconds = float(setting('JOB_RETRY_SECONDS', 5))
+        self.poll_seconds = float(setting('JOB_POLL_SECONDS', 2))
+        self.timeout = int(setting('JOB_TIMEOUT', 600))
+        self.keep_days = int(setting('JOB_KEEP_DAYS', 7))
+
+        @app.before_request
+        def start_job_workers():
+            # After a gunicorn fork the parent's threads are gone - start ours
+            self.start()
+
+        @app.cli.command('run-jobs')
+        @click.option('--workers', default=2, help='Consumer threads')
+        def run_jobs_command(workers):
+            """Run background job consumers in the foreground."""
+            print(f"✅ Running {workers} job consumers (Ctrl+C to stop)")
+            self.start(workers)
+            try:
+                self._stop.wait()
+            except KeyboardInterrupt:
+                self.stop()
+
+    def task(self, name):
+        """Register the function that runs jobs called `name`"""
+        def decorator(fn):
+            self.tasks[name] = fn
+            return fn
+        return decorator
+
+    # Producing
+    def enqueue(self, name, delay=0, **kwargs):
+        """
+        Queue `name` to run with `kwargs` (JSON-serialisable) after `delay`
+        seconds. Returns False if an identical job was already pending.
+        """
+        if name not in self.tasks:
+            raise ValueError(f'Unknown job {name!r}')
+        now = datetime.utcnow()
+        values = {
+            'name': name,
+            'payload': json.dumps(kwargs, sort_keys=True),
+            'dedupe_key': dedupe_key(name, kwargs),
+            'status': PENDING,
+            'attempts': 0,
+            'max_attempts': self.max_attempts,
+            'run_at': now + timedelta(seconds=delay),
+            'created_at': now,
+        }
+        with self.db.engine.begin() as conn:
+            queued = self._insert_pending(conn, values)
+        if queued:
+            self.start()
+            self._wake.set()
+        return queued
+
+    def _insert_pending(self, conn, values):
+        """Insert a job unless an identical one is pending; returns True if it was inserted"""
+        table = self.table
+        upsert = UPSERT_INSERTS.get(conn.dialect.name)
+        if upsert is not None:
+            statement = upsert(table).values(values).on_conflict_do_nothing(
+                index_elements=['dedupe_key'], index_where=table.c.status == PENDING)
+            return conn.execute(statement).rowcount == 1
+        pending = conn.execute(select(table.c.id).where(
+            table.c.dedupe_key == values['dedupe_key'], table.c.status == PENDING)).first()
+        if pending is not None:
+            return False
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(table).values(values))
+        except IntegrityError:
+            return False
+        return True
+
+    def try_enqueue(self, name, delay=0, **kwargs):
+        """
+        enqueue() for commit listeners: the data is already committed, so a
+        locked or failing job_queue insert is logged instead of turning a
+        successful save into an error
+        """
+        try:
+            return self.enqueue(name, delay=delay, **kwargs)
+        except Exception as e:
+            print(f"❌ Could not queue job {name}: {e}")
+            return False
+
+    # Consuming
+    def start(self, workers=None):
+        """Start the consumer threads for this process (no-op if running)"""
+        workers = self.workers if workers is None else workers
+        if self._pid == os.getpid() or workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._consume, name=f'jobs-{i}', daemon=True)
+                             for i in range(workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._pid = None
+
+    def _consume(self):
+        while not self._stop.is_set():
+            try:
+                worked = self.run_once()
+            except Exception as e:
+                print(f"❌ Job consumer error: {e}")
+                worked = False
+            if not worked:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _claim(self):
+        """Take the next due job; returns its row or None"""
+        table = self.table
+        now = datetime.utcnow()
+        with self.db.engine.begin() as conn:
+            self._maintain(conn, now)
+            candidates = conn.execute(
+                select(table).where(table.c.status == PENDING, table.c.run_at <= now)
+                .order_by(table.c.run_at, table.c.id).limit(5)
+            ).all()
+            for job in candidates:
+                claimed = conn.execute(
+                    update(table).where(table.c.id == job.id, table.c.status == PENDING)
+                    .values(status=RUNNING, attempts=table.c.attempts + 1, started_at=now)
+                ).rowcount
+                if claimed:
+                    return job
+        return None
+
+    def _maintain(self, conn, now):
+        """Requeue jobs orphaned by a dead worker and prune old finished jobs"""
+        if self._pruned_at and now - self._pruned_at < PRUNE_EVERY:
+            return
+        self._pruned_at = now
+        table = self.table
+        stale = conn.execute(
+            select(table.c.id, table.c.dedupe_key, table.c.attempts, table.c.max_attempts)
+            .where(table.c.status == RUNNING, table.c.started_at < now - timedelta(seconds=self.timeout))
+        ).all()
+        for job in stale:
+            retry_at = now if job.attempts < job.max_attempts else None
+            self._finish(conn, job, FAILED, 'Timed out (worker stopped?)', retry_at=retry_at)
+        conn.execute(delete(table).where(table.c.status.in_((DONE, FAILED)),
+                                         table.c.finished_at < now - timedelta(days=self.keep_days)))
+
+    def _finish(self, conn, job, status, error=None, retry_at=None):
+        table = self.table
+        now = datetime.utcnow()
+        if retry_at is not None and self._requeue(conn, job, retry_at, error):
+            return
+        conn.execute(update(table).where(table.c.id == job.id)
+                     .values(status=status, finished_at=now, last_error=error))
+
+    def _requeue(self, conn, job, retry_at, error):
+        """
+        Put `job` back to pending - unless an identical job was queued
+        meanwhile, in which case that one will do the work. The check is part
+        of the UPDATE, and an enqueue committed in between (which the partial
+        unique index rejects) is caught too. Returns True if requeued.
+        """
+        table = self.table
+        other = table.alias('other')
+        statement = update(table).where(
+            table.c.id == job.id,
+            ~exists().where(other.c.dedupe_key == job.dedupe_key, other.c.status == PENDING),
+        ).values(status=PENDING, run_at=retry_at, last_error=error)
+        try:
+            with conn.begin_nested():
+                return conn.execute(statement).rowcount == 1
+        except IntegrityError:
+            return False
+
+    def run_once(self):
+        """Run one due job; returns False if there was none"""
+        with self.app.app_context():
+            return self._run_next()
+
+    def _run_next(self):
+        job = self._claim()
+        if job is None:
+            return False
+
+        error = None
+        try:
+            task = self.tasks.get(job.name)
+            if task is None:
+                raise LookupError(f'No task registered for {job.name!r}')
+            task(**json.loads(job.payload))
+        except Exception:
+            error = traceback.format_exc()[-MAX_ERROR_LENGTH:]
+            print(f"⚠️ Job {job.name} #{job.id} failed (attempt {job.attempts + 1}/{job.max_attempts})")
+
+        with self.db.engine.begin() as conn:
+            if error is None:
+                self._finish(conn, job, DONE)
+            elif job.attempts + 1 < job.max_attempts:
+                backoff = self.retry_seconds * 2 ** job.attempts
+                self._finish(conn, job, FAILED, error, retry_at=datetime.utcnow() + timedelta(seconds=backoff))
+            else:
+                self._finish(conn, job, FAILED, error)
+        return True
+
+    # Status
+    def summary(self, limit=10):
+        """Counts per status and the most recent jobs, for the dashboard"""
+        table = self.table
+        with self.db.engine.connect() as conn:
+            counts = dict(conn.execute(select(table.c.status, func.count()).group_by(table.c.status)).all())
+            recent = conn.execute(
+                select(table.c.id, table.c.name, table.c.status, table.c.attempts, table.c.max_attempts,
+                       table.c.created_at, table.c.finished_at, table.c.last_error)
+                .order_by(table.c.id.desc()).limit(limit)
+            ).all()
+        return {
+            'counts': {status: counts.get(status, 0) for status in STATUSES},
+            # Just the exception line of each traceback
+            'recent': [dict(row._mapping, last_error=row.last_error.strip().splitlines()[-1] if row.last_error else None)
+                       for row in recent],
+        }
@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 """
 Main application entry point for Kesgrave CMS
+
+    gunicorn -c gunicorn.conf.py main:app   # production profile, schema setup in the master
+    gunicorn main:app                 # workers only build the app - no DB I/O
+    flask --app main init-db          # one-off schema setup per deploy
 """
 
-# Import the Flask app
-from app import app
+from app import create_app, db, setup_database
+from migrations import prepare_database
 
-# Import all routes (this registers them with the app)
-import routes
+app = create_app()
 
 if __name__ == '__main__':
     import os
+    prepare_database(app, db, setup_database)
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,184 @@
+"""
+Idempotent schema migration for existing databases
+
+db.create_all() only creates missing tables - it never adds columns or
+indexes to a table that already exists, so databases deployed before they
+were declared on the models keep the old schema. upgrade() compares the
+metadata with what is actually in the database and adds whatever is missing:
+nullable columns via ALTER TABLE ADD COLUMN, then indexes. It is safe to run
+on every start.
+
+    flask --app main migrate
+
+prepare_database() wraps this for deployments: it takes an exclusive lock
+file so concurrent starts don't race, and skips all database work when a
+stamp file shows the current schema was already applied. Run it once per
+deploy ('flask --app main init-db' or the gunicorn preload hook) rather than
+in every worker.
+"""
+
+import hashlib
+import os
+
+from sqlalchemy import inspect, text
+
+try:
+    import fcntl
+except ImportError:  # Windows - no lock, fine for local development
+    fcntl = None
+
+# Indexes for tables defined outside this package (the Event/Meeting models
+# used by frontend/CMS_API_ENDPOINTS.py filter on status and type). They are
+# only created when the table and all of its columns exist.
+EXTRA_INDEXES = [
+    ('ix_event_status_date', 'event', ('status', 'date')),
+    ('ix_meeting_type_date', 'meeting', ('type', 'date')),
+]
+
+
+def ensure_columns(db):
+    """Add missing nullable columns; returns ['table.column', ...] that were added"""
+    engine = db.engine
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable:
+                    print(f"⚠️ Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f'{table.name}.{column.name}')
+
+    return added
+
+
+def backfill_versions(db, added):
+    """Give rows predating a newly added updated_at column a version"""
+    engine = db.engine
+    with engine.begin() as conn:
+        for name in added:
+            table, column = name.split('.', 1)
+            if column != 'updated_at':
+                continue
+            columns = db.metadata.tables[table].columns
+            source = 'coalesce(created_at, CURRENT_TIMESTAMP)' if 'created_at' in columns else 'CURRENT_TIMESTAMP'
+            conn.execute(text(f'UPDATE {table} SET updated_at = {source} WHERE updated_at IS NULL'))
+
+
+def ensure_indexes(db, extra=EXTRA_INDEXES):
+    """Create any missing indexes; returns the names of the ones created"""
+    engine = db.engine
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    existing = {name: {ix['name'] for ix in inspector.get_indexes(name)} for name in tables}
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for index in table.indexes:
+            if index.name not in existing[table.name]:
+                index.create(engine)
+                created.append(index.name)
+
+    with engine.begin() as conn:
+        for name, table, columns in extra:
+            if table not in tables or name in existing[table]:
+                continue
+            present = {c['name'] for c in inspector.get_columns(table)}
+            if not set(columns) <= present:
+                continue
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
+            created.append(name)
+
+        if created and engine.dialect.name == 'sqlite':
+            # Refresh planner statistics so the new indexes actually get used
+            conn.execute(text('ANALYZE'))
+
+    return created
+
+
+def upgrade(db):
+    """create_all() plus any missing columns and indexes"""
+    db.create_all()
+    added = ensure_columns(db)
+    backfill_versions(db, added)
+    changes = added + ensure_indexes(db)
+    if changes:
+        print(f"✅ Schema upgraded: {', '.join(changes)}")
+    return changes
+
+
+def schema_fingerprint(db):
+    """Hash of the declared tables, columns and indexes"""
+    digest = hashlib.sha1()
+    for table in db.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f'|{column.name}:{column.type}:{column.nullable}'.encode())
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            digest.update(f'|{index.name}:{",".join(c.name for c in index.columns)}'.encode())
+    return digest.hexdigest()
+
+
+def _lock_paths(app, db):
+    """(lock file, stamp file, database file) - kept next to the SQLite file"""
+    with app.app_context():
+        database = db.engine.url.database
+    if not database or database == ':memory:':
+        database = None
+    base = app.config.get('SCHEMA_LOCK_FILE') or (database or os.path.join(app.instance_path, 'database')) + '.schema'
+    return base + '.lock', base + '.stamp', database
+
+
+def prepare_database(app, db, setup=None, force=False):
+    """
+    Run `setup` (default: upgrade) once per schema version, under a lock file.
+    Returns True if the setup ran, False if the stamp showed it was already done.
+    """
+    lock_path, stamp_path, database_file = _lock_paths(app, db)
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    fingerprint = schema_fingerprint(db)
+
+    with open(lock_path, 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if not force and os.path.exists(stamp_path) and (database_file is None or os.path.exists(database_file)):
+                with open(stamp_path) as f:
+                    if f.read().strip() == fingerprint:
+                        return False
+            with app.app_context():
+                if setup:
+                    setup()
+                else:
+                    upgrade(db)
+            with open(stamp_path, 'w') as f:
+                f.write(fingerprint)
+            return True
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def register_cli(app, db, setup=None):
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Add any missing columns and indexes to the existing database."""
+        if not upgrade(db):
+            print("✅ Schema already up to date")
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """One-off schema setup for a deploy (skipped if already applied)."""
+        if not prepare_database(app, db, setup):
+            print("✅ Database already prepared for this schema version")
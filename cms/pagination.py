@@ -0,0 +1,265 @@
+"""
+Keyset pagination and field projection for the public JSON API
+
+Collection endpoints accept:
+  ?limit=N        page size (default 50, max 200)
+  ?after=CURSOR   opaque cursor taken from the previous page's X-Next-Cursor header
+  ?fields=a,b,c   only select (and return) these columns
+
+Without ?limit or ?after the whole collection is returned, as it always was,
+so existing clients keep getting every row. Paginated or not, the body is a
+plain JSON list; the cursor for the next page is sent in the X-Next-Cursor
+and Link headers.
+
+Rows whose nullable sort column (e.g. NewsItem.date) is NULL come after
+every non-NULL value in either direction, so they are neither skipped nor
+repeated across pages. The two groups are read as separate index range
+scans and merged, rather than sorted on `column IS NULL` over the whole
+table.
+
+With ?format=stream or ?format=ndjson (see streaming.py) the whole remaining
+collection after the cursor - or `limit` rows if one is given - is streamed
+instead of returning a single page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request, jsonify
+from sqlalchemy import and_, literal, or_, select, union_all, DateTime
+
+from conditional import version_column
+from fragments import json_list, json_response
+from streaming import stream_mode, stream_json, YIELD_PER
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_limit(value):
+    if value is None or value == '':
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+    return min(limit, MAX_LIMIT)
+
+
+def requested_limit(args):
+    """Page size for a collection request, or None for the legacy full list"""
+    if not args.get('limit') and not args.get('after'):
+        return None
+    return parse_limit(args.get('limit'))
+
+
+def parse_fields(model, value, default_fields):
+    """Turn ?fields=a,b into a list of column names, validated against the model"""
+    if not value:
+        return list(default_fields)
+    columns = model.__table__.columns
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in columns:
+            raise ValueError(f'Unknown field: {name}')
+        if name not in fields:
+            fields.append(name)
+    if not fields:
+        raise ValueError('fields must name at least one column')
+    return fields
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, order_by, cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(order_by):
+        raise ValueError('Invalid cursor')
+
+    decoded = []
+    for name, value in zip(order_by, values):
+        if value is not None and isinstance(model.__table__.columns[name].type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        decoded.append(value)
+    return decoded
+
+
+def _nullable_key(model, order_by):
+    """The first nullable sort column, if any - its NULL rows are paged as a group of their own"""
+    for name in order_by:
+        if model.__table__.columns[name].nullable:
+            return name
+    return None
+
+
+def _after_clause(columns, values, descending):
+    # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y)
+    # Written out rather than as a row-value so it works on every backend and
+    # still lets SQLite use the (a, b) index for a range scan.
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        step = column < value if descending else column > value
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def _branches(model, order_by, after, descending, filters):
+    """
+    [(criteria, sort column names), ...] - each a plain keyset range that can
+    be read straight off the index on its sort columns. With a nullable sort
+    column the NULL rows come second (after every non-NULL value, in either
+    direction), ordered on the remaining keys.
+    """
+    after = dict(zip(order_by, after)) if after is not None else None
+    nullable = _nullable_key(model, order_by)
+    if nullable is None:
+        criteria = list(filters)
+        if after is not None:
+            criteria.append(_after_clause([getattr(model, n) for n in order_by],
+                                          [after[n] for n in order_by], descending))
+        return [(criteria, order_by)]
+
+    column = getattr(model, nullable)
+    rest = [name for name in order_by if name != nullable]
+    branches = []
+    if after is None or after[nullable] is not None:
+        criteria = list(filters) + [column.isnot(None)]
+        if after is not None:
+            criteria.append(_after_clause([getattr(model, n) for n in order_by],
+                                          [after[n] for n in order_by], descending))
+        branches.append((criteria, order_by))
+    criteria = list(filters) + [column.is_(None)]
+    if after is not None and after[nullable] is None and rest:
+        criteria.append(_after_clause([getattr(model, n) for n in rest], [after[n] for n in rest], descending))
+    branches.append((criteria, rest))
+    return branches
+
+
+def serialize_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def keyset_statement(model, fields, order_by, after=None, descending=False, filters=(), limit=None):
+    """
+    select() for `model` ordered by the `order_by` column names, starting
+    after the cursor values, at most `limit` rows. Only the requested
+    `fields` (plus the sort key) are selected, so large Text columns are
+    never loaded unless asked for.
+    """
+    names = list(fields) + [name for name in order_by if name not in fields]
+    columns = [getattr(model, name) for name in names]
+    direction = lambda cs: [c.desc() if descending else c.asc() for c in cs]
+    branches = _branches(model, order_by, after, descending, filters)
+
+    if len(branches) == 1:
+        criteria, sort = branches[0]
+        statement = select(*columns).where(*criteria).order_by(*direction(getattr(model, n) for n in sort))
+        return statement if limit is None else statement.limit(limit)
+
+    # Each branch is limited on its own index; only the (at most 2 * limit)
+    # rows they return are sorted into one page
+    parts = []
+    for group, (criteria, sort) in enumerate(branches):
+        part = select(*columns, literal(group).label('_group')).where(*criteria) \
+            .order_by(*direction(getattr(model, n) for n in sort))
+        if limit is not None:
+            part = part.limit(limit)
+        parts.append(select(part.subquery()))
+    combined = union_all(*parts).subquery()
+    statement = select(*[combined.c[name] for name in names]) \
+        .order_by(combined.c._group, *direction(combined.c[name] for name in order_by))
+    return statement if limit is None else statement.limit(limit)
+
+
+def keyset_rows(model, fields, order_by, after=None, descending=False, filters=(), limit=None, **options):
+    """Execute keyset_statement() on the model's session; rows have the field names as attributes"""
+    statement = keyset_statement(model, fields, order_by, after, descending, filters, limit)
+    return model.query.session.execute(statement, execution_options=options)
+
+
+def page_rows(results, fields, order_by, limit):
+    """Trim a limit + 1 result list to one page (limit None: all). Returns (rows, next_cursor)."""
+    if limit is None:
+        limit = len(results)
+    has_more = len(results) > limit
+    results = results[:limit]
+    rows = [{name: serialize_value(getattr(r, name)) for name in fields} for r in results]
+    next_cursor = None
+    if has_more and results:
+        last = results[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name in order_by])
+    return rows, next_cursor
+
+
+def keyset_page(model, fields, order_by, limit, after=None, descending=False, filters=()):
+    """Fetch one page of `model`. Returns (rows, next_cursor)."""
+    # Fetch one extra row to find out whether there is another page
+    results = keyset_rows(model, fields, order_by, after, descending, filters, limit + 1).all()
+    return page_rows(results, fields, order_by, limit)
+
+
+def keyset_page_bytes(model, fields, order_by, limit, after=None, descending=False, filters=()):
+    """
+    keyset_page() encoded straight to a JSON array, each row taken from the
+    per-row fragment cache (see fragments.py). Returns (body, next_cursor).
+    """
+    hidden = [name for name in ('id', version_column(model).name) if name not in fields]
+    results = keyset_rows(model, list(fields) + hidden, order_by, after, descending, filters,
+                          None if limit is None else limit + 1).all()
+    if limit is None:
+        limit = len(results)
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    serialize = lambda r: {name: serialize_value(getattr(r, name)) for name in fields}
+    body = json_list(model, results, serialize, variant=','.join(fields))
+    next_cursor = None
+    if has_more and results:
+        next_cursor = encode_cursor([getattr(results[-1], name) for name in order_by])
+    return body, next_cursor
+
+
+def keyset_response(model, default_fields, order_by, descending=False, filters=()):
+    """Build a paginated JSON response for the current request"""
+    try:
+        fields = parse_fields(model, request.args.get('fields'), default_fields)
+        limit = requested_limit(request.args)
+        after = decode_cursor(model, order_by, request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mode = stream_mode()
+    if mode:
+        results = keyset_rows(model, fields, order_by, after, descending, filters,
+                              limit if request.args.get('limit') else None, yield_per=YIELD_PER)
+        rows = ({name: serialize_value(getattr(r, name)) for name in fields} for r in results)
+        return stream_json(rows, mode)
+
+    body, next_cursor = keyset_page_bytes(model, fields, order_by, limit, after, descending, filters)
+    response = json_response(body)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
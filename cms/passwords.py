@@ -0,0 +1,201 @@
+"""
+Password hashing and login throttling for the admin login
+
+    hasher = PasswordHasher(app)
+    throttle = LoginThrottle(app)
+
+Hashes use Werkzeug's KDFs with an explicit, configurable method -
+PASSWORD_HASH_METHOD, default 'scrypt:32768:8:1' (N, r, p) or e.g.
+'pbkdf2:sha256:600000'. bench/password_hash.py times the candidates on the
+target machine. The method is stored with each hash, so when it changes a
+user's hash is upgraded the next time they log in (needs_rehash), and
+legacy plaintext passwords are upgraded the same way.
+
+Every login attempt costs the same whether or not the username exists (an
+unknown user is checked against a dummy hash), and at most
+PASSWORD_HASH_CONCURRENCY hashes run at once per process, so a login storm
+can't take every CPU away from the public API.
+
+LoginThrottle keeps sliding windows in memory, checked before any hashing
+or database work:
+  - LOGIN_MAX_PER_IP attempts per client address (default 20)
+  - LOGIN_MAX_FAILURES failed attempts per username (default 5)
+per LOGIN_WINDOW_SECONDS (default 300). Set LOGIN_TRUSTED_PROXIES=1 behind
+a load balancer that appends the client address to X-Forwarded-For.
+
+    flask --app main hash-password     # e.g. for ADMIN_PASSWORD_HASH
+"""
+
+import hmac
+import os
+import threading
+import time
+from collections import deque
+
+import click
+from flask import request
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+KNOWN_METHODS = ('scrypt', 'pbkdf2')
+
+
+def normalize_method(method):
+    """
+    Spell out Werkzeug's defaults, so 'scrypt' == 'scrypt:32768:8:1' and
+    'pbkdf2' == 'pbkdf2:sha256:600000' when deciding whether to rehash
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = [str(2 ** 15), '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+class HasherBusy(Exception):
+    """Raised when PASSWORD_HASH_CONCURRENCY hashes are already running"""
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self._slots = threading.BoundedSemaphore(2)
+        self._wait = 2.0
+        self._dummy = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD))
+        concurrency = int(app.config.get('PASSWORD_HASH_CONCURRENCY', os.environ.get('PASSWORD_HASH_CONCURRENCY', 2)))
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._wait = float(app.config.get('PASSWORD_HASH_WAIT', 2.0))
+        self._dummy = None
+
+        @app.cli.command('hash-password')
+        @click.password_option()
+        def hash_password_command(password):
+            """Print a hash of a password using the configured method."""
+            print(self.hash(password))
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self._wait):
+            raise HasherBusy()
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def is_hash(self, stored):
+        return bool(stored) and '$' in stored and stored.split(':', 1)[0].split('$', 1)[0] in KNOWN_METHODS
+
+    def verify(self, stored, password):
+        """
+        Returns (ok, needs_rehash). `stored` may be None (unknown user): the
+        work is still done against a dummy hash so timing gives nothing away.
+        """
+        if stored is None:
+            if self._dummy is None:
+                # Hashed under the concurrency bound like any other attempt
+                self._dummy = self._run(generate_password_hash, 'dummy password', self.method)
+            self._run(check_password_hash, self._dummy, password or '')
+            return False, False
+        if not self.is_hash(stored):
+            # Legacy plaintext row - compare in constant time, upgrade on success
+            ok = hmac.compare_digest(stored.encode(), (password or '').encode())
+            return ok, ok
+        ok = self._run(check_password_hash, stored, password or '')
+        return ok, ok and self.needs_rehash(stored)
+
+    def needs_rehash(self, stored):
+        return not self.is_hash(stored) or normalize_method(stored.split('$', 1)[0]) != normalize_method(self.method)
+
+
+class SlidingWindow:
+    """Timestamps of recent hits per key, bounded in the number of keys"""
+
+    def __init__(self, limit, window, max_keys=10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, hits, now):
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+
+    def retry_after(self, key):
+        """Seconds until `key` may try again, or 0 if it is under the limit"""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._prune(hits, now)
+            if len(hits) < self.limit:
+                return 0
+            return int(hits[0] + self.window - now) + 1
+
+    def add(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._hits and len(self._hits) >= self.max_keys:
+                # Forget keys whose windows have fully expired
+                for stale in [k for k, h in self._hits.items() if not h or h[-1] <= now - self.window]:
+                    del self._hits[stale]
+                if len(self._hits) >= self.max_keys:
+                    self._hits.pop(next(iter(self._hits)))
+            hits = self._hits.setdefault(key, deque())
+            self._prune(hits, now)
+            hits.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class LoginThrottle:
+    def __init__(self, app=None):
+        self.per_ip = SlidingWindow(20, 300)
+        self.per_user = SlidingWindow(5, 300)
+        self.trusted_proxies = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        def setting(name, default):
+            return int(app.config.get(name, os.environ.get(name, default)))
+        window = setting('LOGIN_WINDOW_SECONDS', 300)
+        self.per_ip = SlidingWindow(setting('LOGIN_MAX_PER_IP', 20), window)
+        self.per_user = SlidingWindow(setting('LOGIN_MAX_FAILURES', 5), window)
+        self.trusted_proxies = setting('LOGIN_TRUSTED_PROXIES', 0)
+
+    def client_address(self):
+        route = request.access_route
+        if self.trusted_proxies and len(route) > self.trusted_proxies:
+            return route[-self.trusted_proxies]
+        return request.remote_addr or 'unknown'
+
+    def check(self, username):
+        """
+        Record an attempt from this client; returns the number of seconds to
+        wait if either window is full (nothing else should run), else 0.
+        """
+        address = self.client_address()
+        wait = max(self.per_ip.retry_after(address), self.per_user.retry_after((username or '').lower()))
+        if not wait:
+            self.per_ip.add(address)
+        return wait
+
+    def failed(self, username):
+        self.per_user.add((username or '').lower())
+
+    def succeeded(self, username):
+        self.per_user.reset((username or '').lower())
@@ -0,0 +1,246 @@
+"""
+Static JSON snapshots of the public API for a CDN / static host
+
+    publisher = Publisher()
+    publisher.init_app(app, cache, publish_targets)
+
+publish_targets() returns [(url, tags), ...] - every public payload and the
+model names it is built from. Each publish renders those URLs through the
+app itself (so the files are byte-for-byte what the API returns; paginated
+collections are followed to the end and written as one list) into a new
+versioned release directory:
+
+    PUBLISH_DIR/releases/20250701T120000123456/api/pages.json
+                                              /api/pages/<slug>.json
+                                              /manifest.json
+    PUBLISH_DIR/current -> releases/20250701T120000123456
+
+and then swaps the `current` symlink atomically, so the static host never
+serves a half-written release. Point the host at PUBLISH_DIR/current.
+
+Publishing is incremental: after a commit (any cache invalidation - ORM
+writes and bulk imports alike) only the files whose tags were written are
+re-rendered; the rest are hard-linked from the previous release. That runs
+in a background thread so admin saves don't wait for it - or, given a
+JobQueue (jobs.py), as a deduplicated 'publish' job that survives restarts -
+and a lock file serialises publishes from several gunicorn workers.
+
+A URL that fails to render keeps its file from the previous release
+(counted as stale and retried on the next publish), so a transient error
+never makes the static host drop a payload it was serving.
+
+Disabled unless PUBLISH_DIR is set. 'flask publish' does a full publish -
+run it daily too, since homepage "upcoming" lists move with the date.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows - no lock, fine for local development
+    fcntl = None
+
+KEEP_RELEASES = 5
+MAX_PAGES = 1000  # cursor pages followed per collection (x 200 rows)
+
+
+def file_for(url):
+    """'/api/pages/about' -> 'api/pages/about.json'"""
+    path = url.split('?', 1)[0].strip('/')
+    return path if os.path.splitext(path)[1] else path + '.json'
+
+
+class Publisher:
+    def __init__(self, app=None, cache=None, targets=None, jobs=None):
+        self.app = None
+        self.directory = None
+        self.targets = targets
+        self.jobs = None
+        self._lock = threading.Lock()
+        self._pending = None
+        self._worker = None
+        self._listening = False
+        if app is not None:
+            self.init_app(app, cache, targets, jobs)
+
+    def init_app(self, app, cache, targets, jobs=None):
+        self.directory = app.config.get('PUBLISH_DIR', os.environ.get('PUBLISH_DIR'))
+        self.app = app
+        self.targets = targets
+        self.keep = int(app.config.get('PUBLISH_KEEP_RELEASES', KEEP_RELEASES))
+        self.jobs = jobs
+        if jobs is not None:
+            jobs.task('publish')(self._publish_job)
+
+        @app.cli.command('publish')
+        def publish_command():
+            """Render every public API payload into a new static release."""
+            if not self.directory:
+                print("⚠️ PUBLISH_DIR is not set")
+                return
+            result = self.publish()
+            print(f"✅ Published release {result['version']}: {result['rendered']} rendered, "
+                  f"{result['linked']} unchanged, {result['stale']} stale, {result['failed']} failed")
+
+        if self.directory and not self._listening:
+            cache.on_invalidate(self.schedule)
+            self._listening = True
+
+    # Incremental publishing after commits
+    def schedule(self, tags):
+        """Queue an incremental publish for `tags`; coalesces bursts of commits"""
+        if self.jobs is not None:
+            self.jobs.try_enqueue('publish', tags=sorted(tags))
+            return
+        with self._lock:
+            self._pending = (self._pending or set()) | set(tags)
+            if self._worker is None:
+                # Not a daemon: a CLI bulk import waits for its publish before exiting
+                self._worker = threading.Thread(target=self._drain, name='publisher')
+                self._worker.start()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                tags, self._pending = self._pending, None
+                if not tags:
+                    self._worker = None
+                    return
+            try:
+                self.publish(tags)
+            except Exception as e:
+                print(f"❌ Static publish failed: {e}")
+
+    def _publish_job(self, tags):
+        self.publish(set(tags))
+
+    def wait(self):
+        worker = self._worker
+        if worker is not None:
+            worker.join()
+
+    # Rendering
+    def _render(self, client, url):
+        """Response body for `url`, with paginated collections joined into one list"""
+        response = client.get(url)
+        if response.status_code != 200:
+            return None
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return response.get_data()
+
+        rows = response.get_json()
+        separator = '&' if '?' in url else '?'
+        for _ in range(MAX_PAGES):
+            if not cursor:
+                break
+            response = client.get(f'{url}{separator}after={cursor}')
+            if response.status_code != 200:
+                return None
+            rows.extend(response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+        return json.dumps(rows, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def _current_release(self):
+        link = os.path.join(self.directory, 'current')
+        return os.path.realpath(link) if os.path.islink(link) else None
+
+    def publish(self, tags=None):
+        """
+        Render a new release and make it current. With `tags`, only targets
+        built from those models are re-rendered. Returns a summary dict.
+        """
+        releases = os.path.join(self.directory, 'releases')
+        os.makedirs(releases, exist_ok=True)
+
+        with open(os.path.join(self.directory, '.publish.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                return self._publish_locked(releases, tags)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _publish_locked(self, releases, tags):
+        previous = self._current_release()
+        version = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        release = os.path.join(releases, version)
+        os.makedirs(release)
+        manifest = {'version': version, 'generated_at': datetime.utcnow().isoformat(), 'files': {}}
+        counts = {'rendered': 0, 'linked': 0, 'stale': 0, 'failed': 0}
+        stale = self._stale_files(previous)
+
+        try:
+            with self.app.app_context():
+                targets = list(self.targets())
+            client = self.app.test_client()
+
+            for url, target_tags in targets:
+                name = file_for(url)
+                path = os.path.join(release, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                old = os.path.join(previous, name) if previous else None
+
+                has_old = old is not None and os.path.exists(old)
+                if tags is not None and has_old and name not in stale and not (set(target_tags) & set(tags)):
+                    self._link(old, path)
+                    counts['linked'] += 1
+                else:
+                    body = self._render(client, url)
+                    if body is None and has_old:
+                        print(f"⚠️ Could not render {url} - keeping the previous file")
+                        self._link(old, path)
+                        counts['stale'] += 1
+                        manifest['files'][name] = {'url': url, 'tags': sorted(target_tags), 'stale': True}
+                        continue
+                    if body is None:
+                        print(f"⚠️ Not published: {url}")
+                        counts['failed'] += 1
+                        continue
+                    with open(path, 'wb') as f:
+                        f.write(body)
+                    counts['rendered'] += 1
+                manifest['files'][name] = {'url': url, 'tags': sorted(target_tags)}
+
+            with open(os.path.join(release, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+        except Exception:
+            shutil.rmtree(release, ignore_errors=True)
+            raise
+
+        # Atomic swap: a new symlink renamed over the old one
+        link = os.path.join(self.directory, 'current')
+        temp_link = f'{link}.{os.getpid()}.tmp'
+        os.symlink(os.path.relpath(release, self.directory), temp_link)
+        os.replace(temp_link, link)
+
+        self._prune(releases, keep={version})
+        return dict(counts, version=version)
+
+    def _stale_files(self, release):
+        """Files the given release kept from an earlier one because they failed to render"""
+        if not release:
+            return set()
+        try:
+            with open(os.path.join(release, 'manifest.json')) as f:
+                files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return set()
+        return {name for name, entry in files.items() if entry.get('stale')}
+
+    def _link(self, old, path):
+        try:
+            os.link(old, path)
+        except OSError:
+            shutil.copy2(old, path)
+
+    def _prune(self, releases, keep):
+        names = sorted(os.listdir(releases))
+        for name in names[:-self.keep]:
+            if name not in keep:
+                shutil.rmtree(os.path.join(releases, name), ignore_errors=True)
@@ -0,0 +1,170 @@
+"""
+Full-text search over pages, news, events and documents (SQLite FTS5)
+
+All searchable rows live in one FTS5 table, search_index. Each source table
+gets AFTER INSERT/UPDATE/DELETE triggers that keep it in sync, so any write -
+admin form, bulk import, raw SQL - updates the index in the same transaction.
+Index rowids are source_id * 8 + kind code, which lets the triggers find the
+row to replace without scanning the index.
+
+    ensure_search_index(db)          # at startup, idempotent; backfills once
+    results = search(db, 'allotment')
+
+Each result's snippet is HTML: the indexed text escaped, with the matched
+terms wrapped in <mark>. Titles are returned as plain text.
+"""
+
+import html
+import re
+
+from sqlalchemy import text
+
+# kind -> (code, table, slug expression, title expression, body expression)
+SOURCES = {
+    'page': (1, 'page', '{r}.slug', '{r}.title', '{r}.content'),
+    'news': (2, 'news_item', 'NULL', '{r}.title', '{r}.content'),
+    'event': (3, 'event', 'NULL', '{r}.title', "{r}.description || ' ' || coalesce({r}.location, '')"),
+    'document': (4, 'document', 'NULL', '{r}.title', "coalesce({r}.category, '') || ' ' || {r}.filename"),
+}
+KIND_BITS = 8
+
+MAX_RESULTS = 50
+
+# snippet() marks matches with these, so the text can be escaped before the
+# real <mark> tags go in
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+_available = {}
+
+
+def fts5_available(db):
+    engine = db.engine
+    if engine.url in _available:
+        return _available[engine.url]
+    available = False
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            options = {row[0] for row in conn.execute(text('PRAGMA compile_options'))}
+        available = 'ENABLE_FTS5' in options
+    _available[engine.url] = available
+    return available
+
+
+def _source_values(kind, row='new'):
+    code, table, slug, title, body = SOURCES[kind]
+    rowid = f'{row}.id * {KIND_BITS} + {code}'
+    return rowid, slug.format(r=row), title.format(r=row), body.format(r=row)
+
+
+def _trigger_sql(kind):
+    code, table, *_ = SOURCES[kind]
+    rowid, slug, title, body = _source_values(kind, 'new')
+    old_rowid = _source_values(kind, 'old')[0]
+    insert = (f"INSERT INTO search_index(rowid, kind, slug, title, body) "
+              f"VALUES ({rowid}, '{kind}', {slug}, {title}, {body});")
+    delete = f"DELETE FROM search_index WHERE rowid = {old_rowid};"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def _backfill_sql(kind):
+    code, table, *_ = SOURCES[kind]
+    rowid, slug, title, body = _source_values(kind, table)
+    return (f"INSERT INTO search_index(rowid, kind, slug, title, body) "
+            f"SELECT {rowid}, '{kind}', {slug}, {title}, {body} FROM {table}")
+
+
+def ensure_search_index(db):
+    """Create the FTS table and triggers if missing; returns False if FTS5 is unavailable"""
+    if not fts5_available(db):
+        print("⚠️ SQLite FTS5 not available - /api/search disabled")
+        return False
+
+    with db.engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        )).first()
+        if not exists:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE search_index USING fts5("
+                "kind UNINDEXED, slug UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        for kind, (code, table, *_) in SOURCES.items():
+            if table not in tables:
+                continue
+            for sql in _trigger_sql(kind):
+                conn.execute(text(sql))
+            if not exists:
+                conn.execute(text(_backfill_sql(kind)))
+    return True
+
+
+def rebuild_search_index(db):
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM search_index"))
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        for kind, (code, table, *_) in SOURCES.items():
+            if table in tables:
+                conn.execute(text(_backfill_sql(kind)))
+
+
+def optimize_search_index(db):
+    """Merge the FTS5 b-tree segments that accumulate with every trigger write"""
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO search_index(search_index) VALUES ('optimize')"))
+
+
+def to_match_query(q):
+    """Turn free text into a safe FTS5 query: every word must match, last one as a prefix"""
+    words = re.findall(r'\w+', q or '')
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return ' '.join(terms)
+
+
+def highlight(snippet):
+    """Escape a snippet() result and turn its match markers into <mark> tags"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search(db, q, kinds=None, limit=20):
+    match = to_match_query(q)
+    if match is None:
+        return []
+    sql = ("SELECT rowid, kind, slug, title, "
+           "snippet(search_index, 3, :mark_start, :mark_end, '…', 16) AS snippet, "
+           "bm25(search_index, 0.0, 0.0, 5.0, 1.0) AS score "
+           "FROM search_index WHERE search_index MATCH :match")
+    params = {'match': match, 'limit': min(limit, MAX_RESULTS), 'mark_start': MARK_START, 'mark_end': MARK_END}
+    if kinds:
+        placeholders = ', '.join(f':kind{i}' for i in range(len(kinds)))
+        sql += f" AND kind IN ({placeholders})"
+        params.update({f'kind{i}': kind for i, kind in enumerate(kinds)})
+    sql += " ORDER BY score LIMIT :limit"
+
+    rows = db.session.execute(text(sql), params).all()
+    return [{
+        'type': row.kind,
+        'id': row.rowid // KIND_BITS,
+        'slug': row.slug,
+        'title': row.title,
+        'snippet': highlight(row.snippet),
+        'score': round(-row.score, 6),  # bm25 is lower-is-better; flip so higher = more relevant
+    } for row in rows]
+
+
+def register_search_cli(app, db):
+    @app.cli.command('reindex-search')
+    def reindex_search_command():
+        """Rebuild the full-text search index from scratch."""
+        if ensure_search_index(db):
+            rebuild_search_index(db)
+            print("✅ Search index rebuilt")
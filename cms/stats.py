@@ -0,0 +1,20 @@
+"""
+Row counts for the dashboard and /health in a single query
+
+count_rows(db, Event, Meeting, Slide) runs
+
+    SELECT (SELECT count(*) FROM event), (SELECT count(*) FROM meeting), ...
+
+so a dashboard view or health probe costs one round trip instead of one per
+model. Callers cache the result through cache.get_or_set() tagged with the
+model names, so any committed write to those models refreshes it.
+"""
+
+from sqlalchemy import select, func
+
+
+def count_rows(db, *models):
+    """Return {model.__name__: row count} for each model, in one round trip"""
+    columns = [select(func.count()).select_from(model.__table__).scalar_subquery() for model in models]
+    row = db.session.execute(select(*columns)).one()
+    return {model.__name__: count for model, count in zip(models, row)}
@@ -0,0 +1,76 @@
+"""
+Streaming JSON responses for large collections
+
+jsonify() builds every dict and then the whole JSON string before the first
+byte goes out. stream_json() instead walks a query with yield_per (so only a
+batch of rows is in memory at a time) and writes the JSON array - or NDJSON,
+one object per line - as it goes.
+
+Clients opt in with ?format=stream (JSON array) or ?format=ndjson /
+Accept: application/x-ndjson.
+"""
+
+import json
+
+from flask import Response, request, stream_with_context
+
+YIELD_PER = 500
+# Rows are encoded one at a time but written in chunks so the WSGI server
+# isn't asked to flush a few hundred bytes at a time.
+CHUNK_ROWS = 100
+
+
+def stream_mode():
+    """'json', 'ndjson' or None (buffered response) for the current request"""
+    fmt = request.args.get('format')
+    if fmt == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if fmt == 'stream':
+        return 'json'
+    return None
+
+
+def _encode(row):
+    return json.dumps(row, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def iter_json_array(rows):
+    yield '['
+    buffer = []
+    first = True
+    for row in rows:
+        buffer.append(_encode(row) if first else ',' + _encode(row))
+        first = False
+        if len(buffer) >= CHUNK_ROWS:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+    yield ']'
+
+
+def iter_ndjson(rows):
+    buffer = []
+    for row in rows:
+        buffer.append(_encode(row) + '\n')
+        if len(buffer) >= CHUNK_ROWS:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_json(rows, mode='json'):
+    """
+    Stream an iterable of dicts. The iterable is consumed lazily inside the
+    request context, so it can be a generator over a yield_per query.
+    """
+    if mode == 'ndjson':
+        return Response(stream_with_context(iter_ndjson(rows)), mimetype='application/x-ndjson')
+    return Response(stream_with_context(iter_json_array(rows)), mimetype='application/json')
+
+
+def stream_query(query, serialize, mode='json'):
+    """Stream the results of an ORM query, fetching YIELD_PER rows at a time"""
+    rows = (serialize(obj) for obj in query.yield_per(YIELD_PER))
+    return stream_json(rows, mode)
@@ -0,0 +1,20 @@
+"""
+Admin template setup: compiled once per process, bytecode shared on disk
+
+Templates live in cms/templates/ (cms/ for app.py, simple/ for
+SINGLE_FILE_SOLUTION.py and cms_routes.py) and extend a shared base layout.
+Jinja keeps each compiled template in memory after the first render, and the
+bytecode cache lets new gunicorn workers load the compiled code from disk
+instead of parsing the source again.
+"""
+
+import os
+import tempfile
+
+from jinja2 import FileSystemBytecodeCache
+
+
+def configure_templates(app):
+    directory = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'kesgrave_jinja'))
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
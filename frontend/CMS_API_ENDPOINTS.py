@@ -1,10 +1,15 @@
 # CMS API Endpoints for Kesgrave Website Integration
 # Add these routes to your cms_final_complete.py file
+# (expects `cache = Cache(app, db)` from cms/cache.py to be set up there)
 
 from flask import jsonify
+from conditional import conditional
+from streaming import stream_mode, stream_query
 
 # Footer Links API Endpoint
 @app.route('/api/footer-links', methods=['GET'])
+@cache.cached()
+@conditional()
 def get_footer_links():
     """API endpoint to get footer links for the frontend website"""
     try:
@@ -24,6 +29,8 @@ def get_footer_links():
 
 # Header Links API Endpoint (Optional)
 @app.route('/api/header-links', methods=['GET'])
+@cache.cached()
+@conditional()
 def get_header_links():
     """API endpoint to get header navigation links"""
     try:
@@ -42,6 +49,8 @@ def get_header_links():
 
 # Content Pages API Endpoint (Optional - for dynamic content)
 @app.route('/api/content/<category>/<page>', methods=['GET'])
+@cache.cached('ContentPage')
+@conditional(ContentPage)
 def get_content_page(category, page):
     """Get specific content page from CMS"""
     try:
@@ -79,6 +88,8 @@ def after_request(response):
 
 # Events API Endpoint (Optional - for dynamic events)
 @app.route('/api/events', methods=['GET'])
+@cache.cached('Event')
+@conditional(Event)
 def get_events():
     """Get events for the frontend website"""
     try:
@@ -102,16 +113,17 @@ def get_events():
 
 # Meetings API Endpoint (Optional - for dynamic meetings)
 @app.route('/api/meetings/<meeting_type>', methods=['GET'])
+@cache.cached('Meeting')
+@conditional(Meeting)
 def get_meetings(meeting_type):
     """Get meetings by type for the frontend website"""
     try:
-        meetings = Meeting.query.filter_by(
+        query = Meeting.query.filter_by(
             type=meeting_type.replace('-', ' ').title()
-        ).order_by(Meeting.date.desc()).all()
+        ).order_by(Meeting.date.desc())
         
-        meetings_data = []
-        for meeting in meetings:
-            meetings_data.append({
+        def meeting_to_dict(meeting):
+            return {
                 'id': meeting.id,
                 'title': meeting.title,
                 'date': meeting.date.isoformat() if meeting.date else None,
@@ -119,9 +131,14 @@ def get_meetings(meeting_type):
                 'location': meeting.location,
                 'agenda_url': meeting.agenda_url,
                 'minutes_url': meeting.minutes_url
-            })
+            }
+        
+        # ?format=stream / ?format=ndjson for archive views and exports
+        mode = stream_mode()
+        if mode:
+            return stream_query(query, meeting_to_dict, mode)
         
-        return jsonify(meetings_data)
+        return jsonify([meeting_to_dict(m) for m in query.all()])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -4,6 +4,7 @@ import EventModal from '../components/EventModal';
 
 const EventsPage = () => {
   const [events, setEvents] = useState([]);
+  const [monthsWithEvents, setMonthsWithEvents] = useState([]);
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -22,34 +23,30 @@ const EventsPage = () => {
 
   const API_BASE_URL = 'http://127.0.0.1:8027';
 
-  // Fetch events and categories
+  // Fetch month summary, categories and the first upcoming event
   useEffect(() => {
-    fetchEvents();
+    fetchMonthsWithEvents();
     fetchCategories();
+    goToCurrentMonth();
   }, []);
 
-  // Set initial display month after events are loaded
+  // Only the month on screen is downloaded
   useEffect(() => {
-    if (events.length > 0) {
-      const today = new Date();
-      today.setHours(0, 0, 0, 0);
-      
-      // Find first event on or after today
-      const futureEvents = events
-        .filter(event => new Date(event.date) >= today)
-        .sort((a, b) => new Date(a.date) - new Date(b.date));
-      
-      if (futureEvents.length > 0) {
-        const firstFutureEvent = new Date(futureEvents[0].date);
-        setDisplayMonth(firstFutureEvent);
-      }
-    }
-  }, [events]);
+    fetchEvents(displayMonth);
+  }, [displayMonth.getFullYear(), displayMonth.getMonth()]);
 
-  const fetchEvents = async () => {
+  // YYYY-MM-DD for the first day of the month, offset by `add` months
+  const monthStart = (month, add = 0) => {
+    const date = new Date(month.getFullYear(), month.getMonth() + add, 1);
+    return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-01`;
+  };
+
+  const fetchEvents = async (month) => {
     try {
       setLoading(true);
-      const response = await fetch(`${API_BASE_URL}/api/homepage/events`);
+      const response = await fetch(
+        `${API_BASE_URL}/api/events?from=${monthStart(month)}&to=${monthStart(month, 1)}&limit=200`
+      );
       if (response.ok) {
         const data = await response.json();
         setEvents(data);
@@ -64,6 +61,21 @@ const EventsPage = () => {
     }
   };
 
+  const fetchMonthsWithEvents = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/events/months`);
+      if (response.ok) {
+        const data = await response.json();
+        setMonthsWithEvents(data.map(({ month }) => {
+          const [year, monthNumber] = month.split('-');
+          return new Date(parseInt(year), parseInt(monthNumber) - 1, 1);
+        }));
+      }
+    } catch (err) {
+      console.error('Error fetching event months:', err);
+    }
+  };
+
   const fetchCategories = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/event-categories`);
@@ -134,21 +146,7 @@ const EventsPage = () => {
     return events.filter(event => isEventInMonth(event.date, month));
   };
 
-  const getAllMonthsWithEvents = () => {
-    const months = new Set();
-    events.forEach(event => {
-      const eventDate = new Date(event.date);
-      const monthKey = `${eventDate.getFullYear()}-${eventDate.getMonth()}`;
-      months.add(monthKey);
-    });
-    
-    return Array.from(months)
-      .map(key => {
-        const [year, month] = key.split('-');
-        return new Date(parseInt(year), parseInt(month), 1);
-      })
-      .sort((a, b) => a - b);
-  };
+  const getAllMonthsWithEvents = () => monthsWithEvents;
 
   const findNextMonthWithEvents = (startMonth, direction = 1) => {
     const monthsWithEvents = getAllMonthsWithEvents();
@@ -191,22 +189,23 @@ const EventsPage = () => {
     setDisplayMonth(new Date(nextMonth));
   };
 
-  const goToCurrentMonth = () => {
+  const goToCurrentMonth = async () => {
     const today = new Date();
     today.setHours(0, 0, 0, 0);
     
     // Find first event on or after today
-    const futureEvents = events
-      .filter(event => new Date(event.date) >= today)
-      .sort((a, b) => new Date(a.date) - new Date(b.date));
-    
-    if (futureEvents.length > 0) {
-      const firstFutureEvent = new Date(futureEvents[0].date);
-      setDisplayMonth(firstFutureEvent);
-    } else {
-      // If no future events, go to current month
-      setDisplayMonth(today);
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/events/upcoming?limit=1`);
+      const futureEvents = response.ok ? await response.json() : [];
+      if (futureEvents.length > 0) {
+        setDisplayMonth(new Date(futureEvents[0].date));
+        return;
+      }
+    } catch (err) {
+      console.error('Error fetching upcoming events:', err);
     }
+    // If no future events, go to current month
+    setDisplayMonth(today);
   };
 
   // Filter handlers
@@ -276,7 +275,7 @@ const EventsPage = () => {
             <h1 className="text-2xl font-bold text-red-600 mb-4">Error Loading Events</h1>
             <p className="text-gray-600 mb-4">{error}</p>
             <button 
-              onClick={fetchEvents}
+              onClick={() => fetchEvents(displayMonth)}
               className="bg-green-700 text-white px-6 py-2 rounded-md hover:bg-green-800 transition-colors"
             >
               Try Again
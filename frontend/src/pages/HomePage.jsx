@@ -30,32 +30,15 @@ console.log('🔍 API URL:', import.meta.env.VITE_CMS_API_URL );
 
   const fetchHomepageData = async () => {
     try {
-      const [slidesRes, eventsRes, meetingsRes, quickLinksRes] = await Promise.all([
-  fetch(`${API_BASE_URL}/api/homepage/slides`),
-  fetch(`${API_BASE_URL}/api/homepage/events`),
-  fetch(`${API_BASE_URL}/api/homepage/meetings`),
-  fetch(`${API_BASE_URL}/api/homepage/quick-links`)
-]);
-
-
-      if (slidesRes.ok) {
-        const slidesData = await slidesRes.json();
-        setSlides(slidesData);
-      }
-
-      if (eventsRes.ok) {
-        const eventsData = await eventsRes.json();
-        setEvents(eventsData);
-      }
-
-      if (meetingsRes.ok) {
-        const meetingsData = await meetingsRes.json();
-        setMeetings(meetingsData);
-      }
-
-      if (quickLinksRes.ok) {
-        const quickLinksData = await quickLinksRes.json();
-        setQuickLinks(quickLinksData);
+      // One request for the whole homepage (slides, events, meetings, quick links)
+      const response = await fetch(`${API_BASE_URL}/api/homepage`);
+
+      if (response.ok) {
+        const data = await response.json();
+        setSlides(data.slides || []);
+        setEvents(data.events || []);
+        setMeetings(data.meetings || []);
+        setQuickLinks(data.quick_links || []);
       }
     } catch (error) {
       console.error('Error fetching homepage data:', error);